@@ -0,0 +1,68 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .views import IngredientsViewSet, RecipesViewSet, TagViewSet
+
+
+def render_response(response):
+    """
+    Рендерит ответ DRF в потоке. Потоковые ответы остаются потоковыми:
+    их тело читает StreamingASGIHandler из foodgram.asgi.
+    """
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    return response
+
+
+def async_view(view):
+    """
+    Асинхронная обёртка над синхронным представлением DRF.
+
+    В Django 3.2 нет асинхронного ORM, поэтому представление целиком,
+    вместе с запросами к базе и рендерингом, выполняется в пуле потоков
+    (thread_sensitive=False). Под ASGI такие запросы обрабатываются
+    параллельно, а не по одному в общем потоке синхронного кода.
+    """
+    def call(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            return render_response(view(request, *args, **kwargs))
+        finally:
+            close_old_connections()
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(call, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    return wrapper
+
+
+tags_list = async_view(TagViewSet.as_view(
+    {'get': 'list'}, basename='tags', detail=False
+))
+tags_detail = async_view(TagViewSet.as_view(
+    {'get': 'retrieve'}, basename='tags', detail=True
+))
+ingredients_list = async_view(IngredientsViewSet.as_view(
+    {'get': 'list'}, basename='ingredients', detail=False
+))
+recipes_detail = async_view(RecipesViewSet.as_view(
+    {
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    },
+    basename='recipes',
+    detail=True
+))
+download_shopping_cart = async_view(RecipesViewSet.as_view(
+    {'get': 'download_shopping_cart'},
+    basename='recipes',
+    detail=False,
+    **RecipesViewSet.download_shopping_cart.kwargs
+))
@@ -0,0 +1,130 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from foodgram.constants import TOKEN_CACHE_SIZE, TOKEN_CACHE_TIMEOUT
+from foodgram.db_router import use_primary
+
+TOKEN_CACHE_KEY = 'auth-token:{}'
+TOKEN_VERSION_KEY = 'auth-token-version:{}'
+
+
+class TokenCache:
+    """
+    Кэш токенов процесса: не больше max_size записей (LRU), каждая
+    живёт ttl секунд. Промахи ищутся в общем кэше TOKEN_CACHE_ALIAS.
+
+    Каждое попадание сверяется с версией токенов пользователя в общем
+    кэше. Выход и любое изменение пользователя меняют версию, поэтому
+    старые записи перестают приниматься сразу во всех процессах. Без
+    TOKEN_CACHE_ALIAS отзыв виден только текущему процессу.
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TIMEOUT):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def get_version(self, user_id):
+        if self.shared is None:
+            return None
+        return self.shared.get(TOKEN_VERSION_KEY.format(user_id))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > time.monotonic():
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(TOKEN_CACHE_KEY.format(key))
+            if entry is not None:
+                self._remember(key, *entry)
+        if entry is None:
+            return None
+        token, version = entry[:2]
+        if version != self.get_version(token.user_id):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return token
+
+    def set(self, key, token):
+        version = self.get_version(token.user_id)
+        self._remember(key, token, version)
+        if self.shared is not None:
+            self.shared.set(
+                TOKEN_CACHE_KEY.format(key), (token, version), self.ttl
+            )
+
+    def _remember(self, key, token, version):
+        with self._lock:
+            self._entries[key] = (
+                token, version, time.monotonic() + self.ttl
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke_user(self, user_id):
+        """Отзывает все закэшированные токены пользователя."""
+        with self._lock:
+            for key in [
+                key for key, (token, _, _) in self._entries.items()
+                if token.user_id == user_id
+            ]:
+                del self._entries[key]
+        if self.shared is not None:
+            self.shared.set(
+                TOKEN_VERSION_KEY.format(user_id), uuid.uuid4().hex, None
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса к базе на каждый запрос: токен
+    вместе с пользователем берётся из token_cache.
+
+    Токены пользователя отзываются при выходе (удалении токена) и при
+    любом сохранении пользователя, в том числе при смене пароля и
+    деактивации. Активность пользователя проверяется и для токена из
+    кэша.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            # Только что выданного токена может ещё не быть на реплике.
+            with use_primary():
+                user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        # Копия, чтобы изменения request.user не попадали в кэш.
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token.user, token
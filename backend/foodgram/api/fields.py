@@ -2,8 +2,11 @@ import base64
 import re
 
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
+from recipes.images import IMAGE_VARIANTS
+
 
 class Base64ImageField(serializers.ImageField):
     """Кастомный сериализатор для работы с изображением."""
@@ -29,3 +32,29 @@ class Hex2NameColor(serializers.Field):
         if not re.match(r'^#?([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})$', data):
             raise serializers.ValidationError('Неверный формат RGB цвета')
         return data
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Ссылки на уменьшенные копии фото рецепта. Пока копия не готова,
+    отдаётся ссылка на оригинал.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        if not recipe.image:
+            return None
+        request = self.context.get('request')
+        variants = recipe.image_variants or {}
+        urls = {}
+        for variant in IMAGE_VARIANTS:
+            name = variants.get(variant)
+            url = default_storage.url(name) if name else recipe.image.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant] = url
+        return urls
@@ -1,17 +1,39 @@
+from django import forms
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Recipe, Tag
+from recipes.catalog import tag_ids
+from recipes.models import Recipe
 
 User = get_user_model()
 
+TAGS_MATCH_CHOICES = (
+    ('any', 'Любой из тегов'),
+    ('all', 'Все теги'),
+)
+ORDERING_CHOICES = (
+    ('popular', 'Сначала популярные'),
+)
+
+
+class MultipleValueField(forms.MultipleChoiceField):
+    """Поле для нескольких значений без списка допустимых вариантов."""
+
+    def valid_value(self, value):
+        return True
+
+
+class MultipleValueFilter(filters.MultipleChoiceFilter):
+    field_class = MultipleValueField
+
 
 class RecipeFilter(FilterSet):
     """Фильтрация рецептов."""
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = MultipleValueFilter(method='filter_tags')
+    tags_match = filters.ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES,
+        method='filter_tags_match',
     )
     is_favorited = filters.BooleanFilter(
         method='get_is_favorited',
@@ -19,11 +41,48 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=ORDERING_CHOICES,
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
         fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
 
+    def filter_tags(self, queryset, name, value):
+        """
+        Фильтрация по слагам тегов через EXISTS, без JOIN, который
+        размножает строки рецептов.
+        """
+        ids = tag_ids.get(value)
+        if not ids:
+            return queryset.none()
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk')
+        )
+        if self.form.cleaned_data.get('tags_match') == 'all':
+            if len(ids) < len(set(value)):
+                # Неизвестного тега нет ни у одного рецепта.
+                return queryset.none()
+            for tag_id in ids:
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag_id=tag_id))
+                )
+            return queryset
+        return queryset.filter(Exists(recipe_tags.filter(tag_id__in=ids)))
+
+    def filter_tags_match(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортировка по популярности использует индекс по счётчику."""
+        return queryset.order_by('-favorites_count', 'id')
+
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
             return queryset.filter(favorites__user=self.request.user)
@@ -0,0 +1,386 @@
+import json
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from itertools import count
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.utils import percentile
+from foodgram.constants import (
+    BENCHMARK_ITERATIONS,
+    BENCHMARK_TOLERANCE,
+    DATASET_PASSWORD,
+    DATASET_USERNAME_PREFIX,
+)
+from recipes import background
+from recipes.catalog import bump_catalog_version
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.shopping_list import invalidate_shopping_lists
+from users.models import Subscribe, User
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+# Абсолютный запас к порогу p95, чтобы не ловить шум на быстрых запросах.
+LATENCY_SLACK_MS = 1.0
+
+Scenario = namedtuple(
+    'Scenario', 'name method path data prepare', defaults=(None, None)
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замерить p50/p95 времени ответа и число SQL-запросов для '
+        'эндпоинтов API и сравнить их с сохранённым эталоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=BENCHMARK_ITERATIONS,
+            help='Число замеров каждого запроса',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=Path(settings.BASE_DIR) / 'benchmark_baseline.json',
+            help='Файл с эталонными результатами',
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Сохранить результаты как новый эталон',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+            help='Допустимый относительный рост p95',
+        )
+        parser.add_argument(
+            '--only', default='',
+            help='Замерять только запросы, в имени которых есть строка',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Нужен хотя бы один замер')
+        self.user = User.objects.filter(
+            username__startswith=DATASET_USERNAME_PREFIX
+        ).order_by('pk').first()
+        if self.user is None:
+            raise CommandError('Сначала выполните generate_dataset')
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                MEDIA_ROOT=media_root,
+                CACHES={
+                    alias: {
+                        'BACKEND':
+                            'django.core.cache.backends.locmem.LocMemCache',
+                        'LOCATION': f'benchmark-{alias}',
+                    }
+                    for alias in settings.CACHES
+                },
+            ), transaction.atomic():
+                results = self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        baseline_path = Path(options['baseline'])
+        baseline = {}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())['endpoints']
+        regressions = self.report(results, baseline, options['tolerance'])
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps(
+                {'vendor': connection.vendor, 'endpoints': results},
+                ensure_ascii=False,
+                indent=2,
+            ))
+            self.stdout.write(f'Эталон сохранён в {baseline_path}')
+        elif regressions:
+            raise CommandError(
+                'Ухудшение относительно эталона: ' + ', '.join(regressions)
+            )
+
+    def run(self, options):
+        self.client = Client()
+        self.context = self.get_context()
+        results = {}
+        for scenario in self.get_scenarios():
+            if options['only'] not in scenario.name:
+                continue
+            durations = []
+            queries = 0
+            for _ in range(options['iterations'] + 1):
+                duration, queries, status = self.measure(scenario)
+                if status >= 400:
+                    raise CommandError(
+                        f'{scenario.name}: ответ со статусом {status}'
+                    )
+                durations.append(duration)
+            durations = durations[1:]
+            results[scenario.name] = {
+                'p50_ms': round(percentile(durations, 0.5), 2),
+                'p95_ms': round(percentile(durations, 0.95), 2),
+                'queries': queries,
+            }
+        return results
+
+    def measure(self, scenario):
+        params = dict(self.context)
+        if scenario.prepare is not None:
+            with background.defer() as tasks:
+                params.update(scenario.prepare(params) or {})
+                self.run_on_commit()
+            self.run_tasks(tasks)
+        data = scenario.data
+        if callable(data):
+            data = data(params)
+        token, _ = Token.objects.get_or_create(user=self.user)
+        kwargs = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        if data is not None:
+            kwargs.update(
+                data=json.dumps(data), content_type='application/json'
+            )
+        request = getattr(self.client, scenario.method)
+        path = scenario.path.format(**params)
+        with background.defer() as tasks:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                self.run_on_commit()
+                duration = (time.perf_counter() - started) * 1000
+            self.run_tasks(tasks)
+        return duration, len(queries), response.status_code
+
+    def run_on_commit(self):
+        """
+        Выполнить on_commit-обработчики, накопленные во внешней
+        транзакции, как если бы запрос зафиксировал свою: иначе не
+        сбрасываются кэши и не запускаются фоновые задачи.
+        """
+        while connection.run_on_commit:
+            callbacks = connection.run_on_commit
+            connection.run_on_commit = []
+            for _, callback in callbacks:
+                callback()
+
+    def run_tasks(self, tasks):
+        """Фоновые задачи запроса — вне замера, как в пуле потоков."""
+        while tasks:
+            function, args = tasks.pop(0)
+            function(*args)
+            self.run_on_commit()
+
+    def reset_catalog(self, params):
+        """Подготовка: замерять теги и ингредиенты без кэша."""
+        bump_catalog_version()
+
+    def reset_shopping_list(self, params):
+        """Подготовка: замерять построение списка покупок без кэша."""
+        invalidate_shopping_lists(self.user.pk)
+
+    def get_context(self):
+        user = self.user
+        author = User.objects.filter(
+            subscribing__user=user
+        ).first() or User.objects.exclude(pk=user.pk).first()
+        recipe = Recipe.objects.exclude(author=user).order_by('pk').first()
+        if author is None or recipe is None:
+            raise CommandError('В наборе данных слишком мало записей')
+        ingredient = Ingredient.objects.order_by('pk').first()
+        tag = Tag.objects.order_by('pk').first()
+        own = Recipe.objects.filter(author=user).order_by('pk').first()
+        if own is None:
+            own = self.create_recipe(user, ingredient, tag)
+        return {
+            'author': author.pk,
+            'recipe': recipe.pk,
+            'own_recipe': own.pk,
+            'ingredient': ingredient.pk,
+            'prefix': ingredient.name[:2],
+            'tag': tag.pk,
+            'tag_slug': tag.slug,
+            'bulk': list(Recipe.objects.exclude(
+                author=user
+            ).order_by('pk').values_list('pk', flat=True)[:10]),
+        }
+
+    def create_recipe(self, user, ingredient, tag):
+        recipe = Recipe.objects.create(
+            author=user,
+            name='Рецепт для бенчмарка',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/images/benchmark.jpg',
+        )
+        recipe.tags.set([tag])
+        recipe.recipe_ingredients.create(ingredient=ingredient, amount=10)
+        return recipe
+
+    def recipe_data(self, params):
+        return {
+            'ingredients': [{'id': params['ingredient'], 'amount': 10}],
+            'tags': [params['tag']],
+            'image': IMAGE,
+            'name': 'Рецепт для бенчмарка',
+            'text': 'Описание',
+            'cooking_time': 10,
+        }
+
+    def set_relation(self, model, exists, **lookup):
+        """Подготовка: создать или удалить связь перед замером."""
+        def prepare(params):
+            values = {
+                field: params[key] for field, key in lookup.items()
+            }
+            values['user'] = self.user
+            if exists:
+                model.objects.get_or_create(**values)
+            else:
+                for instance in model.objects.filter(**values):
+                    instance.delete()
+        return prepare
+
+    def new_recipe(self, params):
+        recipe = self.create_recipe(
+            self.user,
+            Ingredient.objects.get(pk=params['ingredient']),
+            Tag.objects.get(pk=params['tag']),
+        )
+        return {'victim': recipe.pk}
+
+    def get_scenarios(self):
+        numbers = count()
+        favorite = {'recipe_id': 'recipe'}
+        subscription = {'author_id': 'author'}
+        return (
+            Scenario('ingredients-list', 'get',
+                     '/api/ingredients/?name={prefix}',
+                     prepare=self.reset_catalog),
+            Scenario('ingredients-list-cached', 'get',
+                     '/api/ingredients/?name={prefix}'),
+            Scenario('ingredients-detail', 'get',
+                     '/api/ingredients/{ingredient}/',
+                     prepare=self.reset_catalog),
+            Scenario('tags-list', 'get', '/api/tags/',
+                     prepare=self.reset_catalog),
+            Scenario('tags-list-cached', 'get', '/api/tags/'),
+            Scenario('tags-detail', 'get', '/api/tags/{tag}/',
+                     prepare=self.reset_catalog),
+            Scenario('recipes-list', 'get', '/api/recipes/'),
+            Scenario('recipes-list-filtered', 'get',
+                     '/api/recipes/?tags={tag_slug}&is_favorited=1'),
+            Scenario('recipes-list-popular', 'get',
+                     '/api/recipes/?ordering=popular'),
+            Scenario('recipes-list-search', 'get',
+                     '/api/recipes/?search={prefix}'),
+            Scenario('recipes-list-cursor', 'get', '/api/recipes/?cursor='),
+            Scenario('recipes-detail', 'get', '/api/recipes/{recipe}/'),
+            Scenario('recipes-create', 'post', '/api/recipes/',
+                     self.recipe_data),
+            Scenario('recipes-update', 'patch', '/api/recipes/{own_recipe}/',
+                     self.recipe_data),
+            Scenario('recipes-delete', 'delete', '/api/recipes/{victim}/',
+                     prepare=self.new_recipe),
+            Scenario('recipes-feed', 'get', '/api/recipes/feed/'),
+            Scenario('recipes-favorite', 'post',
+                     '/api/recipes/{recipe}/favorite/',
+                     prepare=self.set_relation(Favorite, False, **favorite)),
+            Scenario('recipes-unfavorite', 'delete',
+                     '/api/recipes/{recipe}/favorite/',
+                     prepare=self.set_relation(Favorite, True, **favorite)),
+            Scenario('recipes-favorite-bulk', 'post', '/api/recipes/favorite/',
+                     lambda params: {'recipes': params['bulk']}),
+            Scenario('recipes-shopping-cart', 'post',
+                     '/api/recipes/{recipe}/shopping_cart/',
+                     prepare=self.set_relation(
+                         ShoppingCart, False, **favorite
+                     )),
+            Scenario('recipes-shopping-cart-remove', 'delete',
+                     '/api/recipes/{recipe}/shopping_cart/',
+                     prepare=self.set_relation(
+                         ShoppingCart, True, **favorite
+                     )),
+            Scenario('recipes-shopping-cart-bulk', 'post',
+                     '/api/recipes/shopping_cart/',
+                     lambda params: {'recipes': params['bulk']}),
+            Scenario('recipes-download-shopping-cart', 'get',
+                     '/api/recipes/download_shopping_cart/',
+                     prepare=self.reset_shopping_list),
+            Scenario('recipes-download-shopping-cart-cached', 'get',
+                     '/api/recipes/download_shopping_cart/'),
+            Scenario('users-list', 'get', '/api/users/'),
+            Scenario('users-detail', 'get', '/api/users/{author}/'),
+            Scenario('users-me', 'get', '/api/users/me/'),
+            Scenario('users-create', 'post', '/api/users/',
+                     lambda params: self.new_user(next(numbers))),
+            Scenario('users-set-password', 'post',
+                     '/api/users/set_password/',
+                     {'new_password': DATASET_PASSWORD,
+                      'current_password': DATASET_PASSWORD}),
+            Scenario('users-subscriptions', 'get',
+                     '/api/users/subscriptions/?recipes_limit=3'),
+            Scenario('users-subscribe', 'post',
+                     '/api/users/{author}/subscribe/',
+                     prepare=self.set_relation(
+                         Subscribe, False, **subscription
+                     )),
+            Scenario('users-unsubscribe', 'delete',
+                     '/api/users/{author}/subscribe/',
+                     prepare=self.set_relation(
+                         Subscribe, True, **subscription
+                     )),
+            Scenario('auth-token-login', 'post', '/api/auth/token/login/',
+                     {'email': self.user.email,
+                      'password': DATASET_PASSWORD}),
+            Scenario('auth-token-logout', 'post', '/api/auth/token/logout/'),
+        )
+
+    def new_user(self, number):
+        username = f'{DATASET_USERNAME_PREFIX}-new-{number}'
+        return {
+            'email': f'{username}@example.com',
+            'username': username,
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': DATASET_PASSWORD,
+        }
+
+    def report(self, results, baseline, tolerance):
+        """Печатает таблицу результатов и возвращает список ухудшений."""
+        regressions = []
+        self.stdout.write(
+            f'{"запрос":<40}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"SQL":>6}  эталон p95/SQL'
+        )
+        for name, result in results.items():
+            line = (
+                f'{name:<40}{result["p50_ms"]:>10.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["queries"]:>6}'
+            )
+            base = baseline.get(name)
+            if base is None:
+                self.stdout.write(line)
+                continue
+            slower = result['p95_ms'] > (
+                base['p95_ms'] * (1 + tolerance) + LATENCY_SLACK_MS
+            )
+            more_queries = result['queries'] > base['queries']
+            line += f'  {base["p95_ms"]:.2f}/{base["queries"]}'
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return regressions
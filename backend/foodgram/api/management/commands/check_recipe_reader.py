@@ -0,0 +1,79 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.readers import RecipeReader
+from api.serializers import RecipeSerializer
+from foodgram.constants import BULK_BATCH_SIZE
+from recipes.models import Recipe
+from users.models import User
+
+MAX_REPORTED = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверить, что RecipeReader отдаёт тот же JSON, что и '
+        'RecipeSerializer, для анонимного и указанных пользователей'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', default=[], dest='users',
+            help='Имя пользователя (можно указать несколько раз)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        users = [AnonymousUser()] + list(
+            User.objects.filter(username__in=options['users'])
+        )
+        renderer = JSONRenderer()
+        checked = 0
+        mismatches = []
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for user in users:
+                request = RequestFactory().get('/api/recipes/')
+                request.user = user
+                for batch in self.batches(options['batch_size']):
+                    queryset = Recipe.objects.filter(
+                        pk__in=batch
+                    ).with_user_flags(user).order_by('pk')
+                    expected = RecipeSerializer(
+                        queryset.with_related(),
+                        many=True,
+                        context={'request': request},
+                    ).data
+                    reader = RecipeReader(request)
+                    actual = reader.represent(reader.values(queryset))
+                    if len(expected) != len(actual):
+                        raise CommandError('Разное число рецептов')
+                    for left, right in zip(expected, actual):
+                        if renderer.render(left) != renderer.render(right):
+                            mismatches.append((user, left['id']))
+                    checked += len(batch)
+        if mismatches:
+            raise CommandError(
+                f'Расхождений: {len(mismatches)}; первые (пользователь, '
+                'рецепт): ' + ', '.join(
+                    f'({user}, {recipe_id})'
+                    for user, recipe_id in mismatches[:MAX_REPORTED]
+                )
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено представлений рецептов: {checked}, расхождений нет'
+        ))
+
+    def batches(self, size):
+        last_id = 0
+        recipes = Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        while True:
+            batch = list(recipes.filter(pk__gt=last_id)[:size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
@@ -0,0 +1,114 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+from foodgram.db_router import PRIMARY_DATABASE, get_pin_key
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверить маршрутизацию чтения на реплики: запись, чтение '
+        'своих изменений с основной базы и чтение с реплики после '
+        'окончания закрепления'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Имя пользователя, от которого идут запросы',
+        )
+
+    def handle(self, *args, **options):
+        self.replicas = settings.REPLICA_DATABASES
+        if not self.replicas:
+            raise CommandError(
+                'Реплики не настроены: задайте DB_REPLICA_HOSTS или '
+                'DB_REPLICA_NAMES'
+            )
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        recipe = Recipe.objects.exclude(
+            favorites__user=user
+        ).order_by('pk').first()
+        if recipe is None:
+            raise CommandError('Нет рецепта, которого нет в избранном')
+        token, _ = Token.objects.get_or_create(user=user)
+        authorization = f'Token {token.key}'
+        self.client = Client(HTTP_AUTHORIZATION=authorization)
+        path = f'/api/recipes/{recipe.pk}/'
+        pin_key = get_pin_key(authorization)
+        cache.delete(pin_key)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.run_checks(path, pin_key)
+        finally:
+            Favorite.objects.filter(user=user, recipe=recipe).delete()
+            cache.delete(pin_key)
+        self.stdout.write(self.style.SUCCESS('Маршрутизация работает'))
+
+    def run_checks(self, path, pin_key):
+        response, primary, replica = self.request('post', f'{path}favorite/')
+        self.expect(response.status_code == 201, 'запись', response)
+        self.expect(
+            primary and not replica, 'запись идёт в основную базу', response
+        )
+        if not cache.get(pin_key):
+            raise CommandError('После записи клиент не закреплён')
+        response, primary, replica = self.request('get', path)
+        self.expect(response.status_code == 200, 'чтение после записи',
+                    response)
+        self.expect(
+            not replica, 'чтение после записи идёт в основную базу',
+            response
+        )
+        self.expect(
+            response.json()['is_favorited'],
+            'чтение после записи видит свои изменения', response
+        )
+        self.stdout.write(
+            f'Чтение после записи: основная база, SQL-запросов {primary}'
+        )
+        cache.delete(pin_key)
+        response, primary, replica = self.request('get', path)
+        self.expect(
+            replica, 'чтение без закрепления идёт на реплику', response
+        )
+        state = 'видит' if response.status_code == 200 and (
+            response.json()['is_favorited']
+        ) else 'ещё не видит'
+        self.stdout.write(
+            f'Чтение без закрепления: реплика, SQL-запросов {replica} '
+            f'(на основной {primary}), реплика {state} запись'
+        )
+
+    def request(self, method, path):
+        """Ответ и число SQL-запросов к основной базе и к репликам."""
+        with ExitStack() as stack:
+            primary = stack.enter_context(
+                CaptureQueriesContext(connections[PRIMARY_DATABASE])
+            )
+            replicas = [
+                stack.enter_context(
+                    CaptureQueriesContext(connections[alias])
+                )
+                for alias in self.replicas
+            ]
+            response = getattr(self.client, method)(path)
+        return response, len(primary), sum(map(len, replicas))
+
+    def expect(self, condition, title, response):
+        if not condition:
+            raise CommandError(
+                f'Не выполнено: {title} (ответ {response.status_code})'
+            )
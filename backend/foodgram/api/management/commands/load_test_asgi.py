@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.utils import percentile, stream_parts
+from foodgram.constants import DATASET_USERNAME_PREFIX
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнить WSGI и ASGI режимы в одном процессе на смеси медленных '
+        '(рецепт, список покупок) и быстрых (теги, ингредиенты) запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=40)
+        parser.add_argument(
+            '--slow-every', type=int, default=4,
+            help='Каждый n-й запрос — медленный',
+        )
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=20,
+            help='Задержка каждого SQL-запроса, имитирующая сеть до базы',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            username__startswith=DATASET_USERNAME_PREFIX
+        ).order_by('pk').first()
+        recipe = Recipe.objects.order_by('pk').first()
+        ingredient = Ingredient.objects.order_by('pk').first()
+        if user is None or recipe is None or ingredient is None:
+            raise CommandError('Сначала выполните generate_dataset')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.authorization = f'Token {token.key}'
+        slow = (
+            f'/api/recipes/{recipe.pk}/',
+            '/api/recipes/download_shopping_cart/',
+        )
+        fast = ('/api/tags/', f'/api/ingredients/?name={ingredient.name[:2]}')
+        self.plan = [
+            (True, slow[number // options['slow_every'] % len(slow)])
+            if number % options['slow_every'] == 0
+            else (False, fast[number % len(fast)])
+            for number in range(options['requests'])
+        ]
+        self.latency = options['db_latency_ms'] / 1000
+        connection_created.connect(self.add_latency)
+        for connection in connections.all():
+            self.add_latency(connection)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                with override_settings(ROOT_URLCONF='foodgram.urls'):
+                    self.run_sync()
+                    self.report('WSGI', self.run_sync())
+                with override_settings(ROOT_URLCONF='foodgram.urls_async'):
+                    asyncio.run(self.run_async())
+                    self.report('ASGI', asyncio.run(self.run_async()))
+        finally:
+            connection_created.disconnect(self.add_latency)
+
+    def add_latency(self, connection, **kwargs):
+        if self.delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self.delay)
+
+    def delay(self, execute, sql, params, many, context):
+        time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def run_sync(self):
+        """Синхронный воркер: запросы обрабатываются по одному."""
+        client = Client()
+        started = time.perf_counter()
+        results = []
+        for is_slow, path in self.plan:
+            response = client.get(
+                path, HTTP_AUTHORIZATION=self.authorization
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            self.assert_ok(path, response)
+            results.append((is_slow, time.perf_counter() - started))
+        return results
+
+    async def run_async(self):
+        """ASGI: все запросы плана поступают одновременно."""
+        client = AsyncClient()
+        started = time.perf_counter()
+
+        async def fetch(is_slow, path):
+            # AsyncClient в Django 3.2 передаёт extra как имена заголовков.
+            response = await client.get(
+                path, authorization=self.authorization
+            )
+            if response.streaming:
+                async for _ in stream_parts(response):
+                    pass
+            self.assert_ok(path, response)
+            return is_slow, time.perf_counter() - started
+
+        return await asyncio.gather(
+            *(fetch(is_slow, path) for is_slow, path in self.plan)
+        )
+
+    def assert_ok(self, path, response):
+        if response.status_code != 200:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+
+    def report(self, mode, results):
+        total = max(finished for _, finished in results)
+        self.stdout.write(
+            f'{mode}: {len(results)} запросов за {total:.2f} с, '
+            f'{len(results) / total:.1f} запросов/с'
+        )
+        for is_slow, title in ((False, 'быстрые'), (True, 'медленные')):
+            latencies = [
+                finished * 1000
+                for slow, finished in results if slow == is_slow
+            ]
+            if latencies:
+                self.stdout.write(
+                    f'  {title}: p50 {percentile(latencies, 0.5):.0f} мс, '
+                    f'p95 {percentile(latencies, 0.95):.0f} мс'
+                )
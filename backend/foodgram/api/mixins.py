@@ -0,0 +1,174 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from foodgram.constants import (
+    CACHE_LOCK_TIMEOUT,
+    CACHE_WAIT_TIMEOUT,
+    RECIPES_CACHE_STALE_TIMEOUT,
+    RECIPES_CACHE_TIMEOUT,
+)
+from foodgram.db_router import use_primary
+from recipes.catalog import get_catalog_version, get_recipes_version
+from .timing import TimedSerializer, get_timing
+
+
+def get_request_digest(request):
+    """
+    Хэш схемы, хоста, пути, нормализованной строки запроса и заголовка
+    Accept. Схема и хост нужны, потому что в ответах есть абсолютные
+    ссылки.
+    """
+    query = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+    )
+    return hashlib.md5(
+        f'{request.scheme}://{request.get_host()}{request.path}|{query}|'
+        f'{request.META.get("HTTP_ACCEPT")}'.encode()
+    ).hexdigest()
+
+
+class CatalogCacheMixin:
+    """
+    Кэширование ответов справочников (теги, ингредиенты).
+
+    ETag и Last-Modified строятся по версии справочников, поэтому запрос
+    с совпадающим If-None-Match получает 304 без обращения к ORM, а полные
+    ответы хранятся в кэше уже отрендеренными.
+    """
+
+    cache_methods = ('GET', 'HEAD')
+
+    def get_catalog_cache_key(self, request, version):
+        digest = get_request_digest(request)
+        return f'catalog:{version}:{digest}', f'"{version}-{digest[:16]}"'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.cache_methods:
+            return super().dispatch(request, *args, **kwargs)
+        version = get_catalog_version()
+        key, etag = self.get_catalog_cache_key(request, version)
+        last_modified = version // 1000
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                with use_primary():
+                    response = super().dispatch(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response.render()
+                cache.set(key, (response.content, response['Content-Type']))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+class TimingMixin:
+    """
+    Замеры вьюсета для RequestTimingMiddleware: время обработки запроса
+    во вьюсете и время получения данных из сериализаторов.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        timing = get_timing(request)
+        if timing is None:
+            return super().dispatch(request, *args, **kwargs)
+        with timing.measure('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = get_timing(self.request)
+        if timing is None:
+            return serializer
+        return TimedSerializer(serializer, timing)
+
+
+class AnonymousCacheMixin:
+    """
+    Кэширование ответов list и retrieve для анонимных GET-запросов.
+
+    Запись хранит версию рецептов, с которой она построена, поэтому после
+    изменения рецептов она становится устаревшей без удаления ключей.
+    Устаревшую запись пересчитывает только один запрос, захвативший
+    блокировку; остальные в это время получают устаревший ответ, а если
+    его нет — ждут нового до CACHE_WAIT_TIMEOUT секунд.
+    """
+
+    anonymous_cache_actions = ('list', 'retrieve')
+    anonymous_cache_poll_interval = 0.05
+
+    def is_anonymous_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and self.action_map.get('get') in self.anonymous_cache_actions
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_anonymous_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        response_cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        version = get_recipes_version()
+        key = f'recipes-response:{get_request_digest(request)}'
+        cached = response_cache.get(key)
+        if self.is_fresh(cached, version):
+            return self.cached_response(cached)
+        lock_key = f'{key}:lock'
+        if not response_cache.add(lock_key, version, CACHE_LOCK_TIMEOUT):
+            if cached is not None:
+                return self.cached_response(cached)
+            deadline = time.monotonic() + CACHE_WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(self.anonymous_cache_poll_interval)
+                cached = response_cache.get(key)
+                if self.is_fresh(cached, version):
+                    return self.cached_response(cached)
+            return super().dispatch(request, *args, **kwargs)
+        try:
+            with use_primary():
+                response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.render()
+                if response['Content-Type'].startswith('application/json'):
+                    response_cache.set(
+                        key,
+                        (
+                            version,
+                            time.time(),
+                            response.content,
+                            response['Content-Type'],
+                        ),
+                        RECIPES_CACHE_STALE_TIMEOUT
+                    )
+        finally:
+            response_cache.delete(lock_key)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def is_fresh(self, cached, version):
+        return (
+            cached is not None
+            and cached[0] >= version
+            and time.time() - cached[1] < RECIPES_CACHE_TIMEOUT
+        )
+
+    def cached_response(self, cached):
+        _, _, content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
@@ -1,8 +1,278 @@
+import base64
+import binascii
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from foodgram.constants import COUNT_CACHE_TIMEOUT, COUNT_ESTIMATE_THRESHOLD
+from recipes.catalog import get_recipes_version
+from .relations import get_relations_version
+
+
+class LookaheadPage(Page):
+    """Страница, о следующей странице которой известно по лишней строке."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = has_next
+
+    def has_next(self):
+        return self.next_exists
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator, который выбирает страницу на одну строку больше и не
+    зависит от общего количества: count_function нужна только для
+    отображаемого count. Приблизительное количество не обрезает
+    последние страницы и не даёт пустых страниц после конца, а на
+    последней странице заменяется точным.
+    """
+
+    def __init__(self, object_list, per_page, count_function, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_function = count_function
+
+    @cached_property
+    def count(self):
+        return self.count_function()
+
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not has_next:
+            self.count = bottom + len(rows)
+        elif self.count <= bottom + len(rows):
+            self.count = bottom + len(rows) + 1
+        self.__dict__.pop('num_pages', None)
+        return LookaheadPage(rows, number, self, has_next)
 
 
 class CustomPagination(PageNumberPagination):
-    """Кастомный класс пагинации."""
+    """
+    Кастомный класс пагинации.
+
+    Общее количество объектов берётся из кэша на COUNT_CACHE_TIMEOUT
+    секунд, а для больших таблиц без фильтров на PostgreSQL — из оценки
+    планировщика. Точное значение можно запросить параметром count=true.
+    Страницы выбираются независимо от этого количества.
+
+    При наличии параметра cursor переключается на пагинацию по ключу:
+    страница выбирается условием по полям view.cursor_ordering, а не
+    OFFSET, и общее количество считается только по запросу count=true.
+    """
 
     page_size = 6
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+    non_filter_params = (
+        'page', 'limit', 'cursor', 'count', 'recipes_limit', 'format'
+    )
+
+    def django_paginator_class(self, queryset, page_size):
+        return CountedPaginator(
+            queryset, page_size, lambda: self.get_count(queryset)
+        )
+
+    def exact_count_requested(self, request):
+        return request.query_params.get(self.count_query_param) in (
+            'true', '1'
+        )
+
+    def get_filter_params(self, request):
+        return sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.non_filter_params
+            for value in values
+        )
+
+    def get_count(self, queryset):
+        request = self.request
+        if self.exact_count_requested(request):
+            return queryset.count()
+        params = self.get_filter_params(request)
+        if not params and not queryset.query.where:
+            estimate = self.estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        digest = hashlib.md5(
+            f'{request.path}|{params}|{request.user.pk}|'
+            f'{get_relations_version(request.user)}|'
+            f'{get_recipes_version()}'.encode()
+        ).hexdigest()
+        key = f'count:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def estimate_count(self, queryset):
+        """Оценка числа строк таблицы из pg_class.reltuples."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < COUNT_ESTIMATE_THRESHOLD:
+            return None
+        return row[0]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        self.ordering = self.get_cursor_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+        self.count = None
+        if self.exact_count_requested(request):
+            self.count = queryset.count()
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_cursor_filter(position))
+        results = list(queryset[:page_size + 1])
+        self.page = results[:page_size]
+        self.next_position = None
+        if len(results) > page_size:
+            last = self.page[-1]
+            self.next_position = [
+                last[field.lstrip('-')] if isinstance(last, dict)
+                else getattr(last, field.lstrip('-'))
+                for field in self.ordering
+            ]
+        return self.page
+
+    def use_cursor(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def get_cursor_ordering(self, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is None:
+            ordering = tuple(
+                queryset.query.order_by or queryset.model._meta.ordering
+            ) + ('pk',)
+        return tuple(ordering)
+
+    def get_cursor_filter(self, position):
+        """
+        Условие «строго после position» для составного ключа. Условие на
+        первое поле вынесено отдельно, чтобы база могла взять диапазон
+        по индексу.
+        """
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup_after = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup_after}': value})
+            equal &= Q(**{name: value})
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & (
+            condition
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(
+                base64.urlsafe_b64decode(encoded.encode()).decode()
+            )
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self.parse_cursor_value(model, field, value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_cursor_value(self, model, field, value):
+        """Значение курсора, приведённое к типу поля сортировки."""
+        name = field.lstrip('-')
+        if name == 'pk':
+            model_field = model._meta.pk
+        else:
+            model_field = model._meta.get_field(name)
+        if value is None or isinstance(value, (bool, dict, list)):
+            raise TypeError(value)
+        return model_field.to_python(value)
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(
+            json.dumps(position, ensure_ascii=False).encode()
+        ).decode()
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['results'] = data
+        return Response(response)
+
+
+class KeysetPagination(CustomPagination):
+    """Пагинация только по ключу, даже без параметра cursor."""
+
+    def use_cursor(self, request):
+        return True
@@ -0,0 +1,70 @@
+from recipes.catalog import bump_version, get_version
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+RELATIONS_VERSION_KEY = 'relations-version:{}'
+
+
+class UserRelations:
+    """
+    Связи текущего пользователя (подписки, избранное, корзина), которые
+    загружаются один раз за запрос: по одному запросу на каждый вид связи.
+    """
+
+    sources = {
+        Subscribe: 'author_id',
+        Favorite: 'recipe_id',
+        ShoppingCart: 'recipe_id',
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self._ids = {}
+
+    def ids(self, model):
+        if self.user is None or not self.user.is_authenticated:
+            return frozenset()
+        if model not in self._ids:
+            self._ids[model] = set(
+                model.objects.filter(
+                    user=self.user
+                ).values_list(self.sources[model], flat=True)
+            )
+        return self._ids[model]
+
+    def invalidate(self, *models):
+        """
+        Сбрасывает загруженные связи (без аргументов — все) и версию
+        связей пользователя, от которой зависят закэшированные счётчики.
+        """
+        for model in models or tuple(self._ids):
+            self._ids.pop(model, None)
+        if self.user is not None and self.user.is_authenticated:
+            bump_version(RELATIONS_VERSION_KEY.format(self.user.id))
+
+    def is_subscribed(self, author_id):
+        return author_id in self.ids(Subscribe)
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.ids(Favorite)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.ids(ShoppingCart)
+
+
+def get_relations(request):
+    """Возвращает связи пользователя, привязанные к запросу."""
+    if request is None:
+        return UserRelations(None)
+    relations = getattr(request, '_user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        request._user_relations = relations
+    return relations
+
+
+def get_relations_version(user):
+    """Версия связей пользователя; меняется при их изменении."""
+    if user is None or not user.is_authenticated:
+        return None
+    return get_version(RELATIONS_VERSION_KEY.format(user.id))
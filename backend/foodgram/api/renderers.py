@@ -0,0 +1,56 @@
+import csv
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+
+class Echo:
+    """Буфер для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListJSONRenderer(JSONRenderer):
+    """Выгрузка списка покупок в JSON."""
+
+    def stream(self, rows):
+        yield '['
+        separator = ''
+        for name, measurement_unit, amount in rows:
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                    'amount': amount,
+                },
+                ensure_ascii=False
+            )
+            separator = ','
+        yield ']'
+
+
+class ShoppingListTextRenderer(ShoppingListJSONRenderer):
+    """Выгрузка списка покупок текстом; ошибки отдаются в JSON."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        for name, measurement_unit, amount in rows:
+            yield f'{name} ({measurement_unit}) — {amount}\n'
+
+
+class ShoppingListCSVRenderer(ShoppingListJSONRenderer):
+    """Выгрузка списка покупок в CSV; ошибки отдаются в JSON."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Единица измерения', 'Количество')
+        )
+        for row in rows:
+            yield writer.writerow(row)
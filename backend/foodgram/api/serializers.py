@@ -1,8 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
 from .validators import username_validator
-from .fields import Base64ImageField, Hex2NameColor
+from .fields import Base64ImageField, Hex2NameColor, ImageVariantsField
+from .relations import get_relations
+from .utils import get_recipes_limit
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -11,12 +14,16 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.images import schedule_recipe_image
+from recipes.ingredient_index import ingredient_index
+from recipes.shopping_list import invalidate_recipe_shopping_lists
 from users.models import Subscribe, User
-from foodgram.constants import MAX_NAME_LENGTH
+from foodgram.constants import MAX_BULK_RECIPES, MAX_NAME_LENGTH
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для краткой информации о рецептах."""
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -24,6 +31,7 @@ class RecipeShortSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
         read_only_fields = (
@@ -56,10 +64,11 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Получение информации о подписке."""
-        user = self.context.get('request').user
-        return user.is_authenticated and user.subscriber.filter(
-            author=obj.id
-        ).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_relations(
+            self.context.get('request')
+        ).is_subscribed(obj.id)
 
 
 class SubscriptionSerializer(UserSerializer):
@@ -92,10 +101,13 @@ class SubscriptionSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        recipes = Recipe.objects.filter(author=obj)
-        limit = request.query_params.get('recipes_limit')
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(obj, 'preview_recipes'):
+            recipes = obj.preview_recipes
+        else:
+            recipes = Recipe.objects.filter(author=obj)
+            limit = get_recipes_limit(request)
+            if limit is not None:
+                recipes = recipes[:limit]
         return RecipeShortSerializer(
             recipes,
             many=True,
@@ -103,7 +115,7 @@ class SubscriptionSerializer(UserSerializer):
         ).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        return obj.recipes_count
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -185,6 +197,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -197,25 +210,29 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         ]
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed') and instance.author:
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=request.user, recipe_id=obj.id
-        ).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return get_relations(
+            self.context.get('request')
+        ).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=request.user, recipe_id=obj.id
-        ).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return get_relations(
+            self.context.get('request')
+        ).is_in_shopping_cart(obj.id)
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
@@ -272,19 +289,9 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                 {'ingredients': 'Это поле не может быть пустым'}
             )
 
-        existing_ingredient_ids = set(
-            Ingredient.objects.values_list('id', flat=True)
-        )
-
-        id_list = []
+        id_set = set()
         for ingredient_data in ingredients:
             ingredient_id = ingredient_data.get('id')
-            if ingredient_id and ingredient_id not in existing_ingredient_ids:
-                raise serializers.ValidationError(
-                    {
-                        'ingredients': f'Ингредиент с id={ingredient_id} '
-                                       f'не существует'}
-                )
             if not ingredient_id:
                 raise serializers.ValidationError(
                     {
@@ -296,11 +303,27 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'amount': 'Количество ингредиента должно быть больше 0!'
                 })
-            if ingredient_id in id_list:
+            if ingredient_id in id_set:
                 raise serializers.ValidationError({
                     'ingredient': 'Ингредиенты должны быть уникальными!'
                 })
-            id_list.append(ingredient_id)
+            id_set.add(ingredient_id)
+
+        existing_ingredient_ids = ingredient_index.existing_ids(id_set)
+        if existing_ingredient_ids is None:
+            existing_ingredient_ids = set(
+                Ingredient.objects.filter(
+                    id__in=id_set
+                ).values_list('id', flat=True)
+            )
+        for ingredient_data in ingredients:
+            ingredient_id = ingredient_data['id']
+            if ingredient_id not in existing_ingredient_ids:
+                raise serializers.ValidationError(
+                    {
+                        'ingredients': f'Ингредиент с id={ingredient_id} '
+                                       f'не существует'}
+                )
 
         if len(tags) != len(set(tags)):
             raise serializers.ValidationError("Теги не должны повторяться.")
@@ -318,6 +341,50 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Применяет к ингредиентам рецепта только изменения: удаляет лишние,
+        обновляет количество и добавляет новые. Возвращает True, если
+        что-то изменилось.
+        """
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredients.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ]
+        if removed:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=removed
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if added:
+            self.create_ingredients(added, recipe)
+        return bool(removed or changed or added)
+
+    def update_tags(self, tags, recipe):
+        tag_ids = {tag.id for tag in tags}
+        current = set(recipe.tags.values_list('id', flat=True))
+        if current - tag_ids:
+            recipe.tags.remove(*(current - tag_ids))
+        if tag_ids - current:
+            recipe.tags.add(*(tag_ids - current))
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -325,16 +392,25 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.create_ingredients(ingredients, recipe)
         recipe.tags.set(tags)
+        transaction.on_commit(lambda: schedule_recipe_image(recipe))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        instance.tags.clear()
-        instance.tags.set(tags)
-        instance.ingredients.clear()
+        if 'image' in validated_data:
+            previous_variants = instance.image_variants
+            validated_data['image_variants'] = {}
+            transaction.on_commit(lambda: schedule_recipe_image(
+                instance, previous_variants
+            ))
         super().update(instance, validated_data)
-        self.create_ingredients(ingredients, instance)
+        self.update_tags(tags, instance)
+        if self.update_ingredients(ingredients, instance):
+            transaction.on_commit(
+                lambda: invalidate_recipe_shopping_lists(instance)
+            )
         return instance
 
     def to_representation(self, instance):
@@ -343,25 +419,6 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         }).data
 
 
-class FavoriteListSerializer(serializers.ModelSerializer):
-    """Cериализатор сведений об избранных рецептах."""
-
-    class Meta:
-        model = Recipe
-        fields = [
-            'id',
-            'name',
-            'image',
-            'cooking_time'
-        ]
-        read_only_fields = (
-            'id',
-            'name',
-            'image',
-            'cooking_time'
-        )
-
-
 class FavoriteSerializer(serializers.ModelSerializer):
     """Cериализатор добавления в избранное."""
 
@@ -384,6 +441,16 @@ class FavoriteSerializer(serializers.ModelSerializer):
         ]
 
     def to_representation(self, instance):
-        return FavoriteListSerializer(instance.recipe, context={
+        return RecipeShortSerializer(instance.recipe, context={
             'request': self.context.get('request')
         }).data
+
+
+class BulkRecipesSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для групповых операций."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
+    )
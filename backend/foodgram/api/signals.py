@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    transaction.on_commit(lambda: token_cache.revoke_user(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, **kwargs):
+    transaction.on_commit(lambda: token_cache.revoke_user(instance.pk))
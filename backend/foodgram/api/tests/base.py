@@ -0,0 +1,62 @@
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import (APIClient,
+                                 APITestCase,
+                                 APITransactionTestCase)
+
+from recipes.models import Recipe
+from users.models import User
+
+TEST_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'test-{alias}',
+    }
+    for alias in ('default', 'responses')
+}
+
+
+class FoodgramTestMixin:
+    """Кэши в памяти процесса, очищаемые перед тестом, и фабрики данных."""
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            email=f'{username}@example.com',
+            username=username,
+            password='foodgram-password',
+            first_name=username,
+            last_name=username,
+        )
+
+    @staticmethod
+    def create_recipe(author, name, text='Описание'):
+        return Recipe.objects.create(
+            author=author,
+            name=name,
+            image='recipes/images/test.png',
+            text=text,
+            cooking_time=5,
+        )
+
+    @staticmethod
+    def get_client(user):
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FoodgramTestCase(FoodgramTestMixin, APITestCase):
+    """Тесты API внутри транзакции, откатываемой после теста."""
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FoodgramTransactionTestCase(FoodgramTestMixin, APITransactionTestCase):
+    """Тесты API, данные которых видны запросам из других потоков."""
@@ -0,0 +1,82 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.utils import stream_parts
+from recipes.models import Ingredient, RecipeIngredient, ShoppingCart, Tag
+from .base import FoodgramTransactionTestCase
+
+
+class AsyncViewsTest(FoodgramTransactionTestCase):
+    """
+    Асинхронные маршруты foodgram.urls_async отдают те же ответы, что и
+    синхронные, в том числе потоковую выгрузку списка покупок.
+    """
+
+    paths = (
+        '/api/tags/',
+        '/api/ingredients/?name=св&limit=5',
+        '/api/recipes/{recipe}/',
+        '/api/recipes/download_shopping_cart/',
+        '/api/recipes/download_shopping_cart/?format=csv',
+        '/api/recipes/0/',
+    )
+
+    def setUp(self):
+        super().setUp()
+        user = self.create_user('carol')
+        recipe = self.create_recipe(user, 'Борщ')
+        recipe.tags.add(Tag.objects.create(
+            name='Обед', color='#2d8fbd', slug='dinner'
+        ))
+        RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=Ingredient.objects.create(
+                name='Свёкла', measurement_unit='г'
+            ),
+            amount=300,
+        )
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        self.authorization = (
+            f'Token {Token.objects.create(user=user).key}'
+        )
+        self.paths = [path.format(recipe=recipe.pk) for path in self.paths]
+
+    def test_async_responses_match_sync(self):
+        expected = {}
+        for path in self.paths:
+            response = self.client.get(
+                path, HTTP_AUTHORIZATION=self.authorization
+            )
+            expected[path] = self.describe(response, (
+                b''.join(response.streaming_content) if response.streaming
+                else response.content
+            ))
+        with override_settings(ROOT_URLCONF='foodgram.urls_async'):
+            actual = async_to_sync(self.get_async)()
+        self.assertEqual(actual, expected)
+
+    async def get_async(self):
+        client = AsyncClient()
+        responses = {}
+        for path in self.paths:
+            response = await client.get(
+                path, authorization=self.authorization
+            )
+            if response.streaming:
+                content = b''.join(
+                    [part async for part in stream_parts(response)]
+                )
+            else:
+                content = response.content
+            responses[path] = self.describe(response, content)
+        return responses
+
+    @staticmethod
+    def describe(response, content):
+        return (
+            response.status_code,
+            response.get('Content-Type'),
+            response.get('Content-Disposition'),
+            content,
+        )
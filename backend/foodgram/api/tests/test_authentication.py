@@ -0,0 +1,48 @@
+from unittest import mock
+
+from rest_framework.authtoken.models import Token
+
+from api.authentication import TokenCache, token_cache
+from .base import FoodgramTestCase
+
+
+class TokenCacheTest(FoodgramTestCase):
+    """
+    Отозванный токен не принимается и процессом, в кэше которого он
+    остался. Другой процесс изображает отдельный TokenCache с тем же
+    общим кэшем.
+    """
+
+    url = '/api/users/me/'
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.user = self.create_user('carol')
+        self.client = self.get_client(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def in_other_process(self):
+        return mock.patch('api.signals.token_cache', TokenCache())
+
+    def test_logout_in_other_process(self):
+        with self.in_other_process(), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_in_other_process(self):
+        with self.in_other_process(), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_cached_inactive_user(self):
+        key = Token.objects.get(user=self.user).key
+        token = token_cache.get(key)
+        token.user.is_active = False
+        token_cache.set(key, token)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
@@ -0,0 +1,29 @@
+from django.test import override_settings
+
+from .base import FoodgramTestCase
+
+
+@override_settings(ALLOWED_HOSTS=['localhost', 'foodgram.example.com'])
+class AnonymousCacheTest(FoodgramTestCase):
+    """Кэш анонимных ответов разделён по схеме и хосту."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('carol')
+        for number in range(2):
+            self.create_recipe(author, f'Рецепт {number}')
+
+    def test_links_follow_request_host(self):
+        url = '/api/recipes/?limit=1'
+        local = self.client.get(url, HTTP_HOST='localhost')
+        public = self.client.get(
+            url, HTTP_HOST='foodgram.example.com', secure=True
+        )
+        self.assertTrue(local.json()['next'].startswith('http://localhost/'))
+        for link in (
+            public.json()['next'],
+            public.json()['results'][0]['image'],
+        ):
+            self.assertTrue(
+                link.startswith('https://foodgram.example.com/'), link
+            )
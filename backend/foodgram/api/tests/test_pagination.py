@@ -0,0 +1,93 @@
+import base64
+import json
+from unittest import mock
+
+from .base import FoodgramTestCase
+
+
+class PaginationTest(FoodgramTestCase):
+    """Страницы не зависят от закэшированного или оценочного count."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('carol')
+        self.client = self.get_client(self.author)
+        self.url = f'/api/recipes/?author={self.author.pk}&limit=2'
+
+    def test_new_recipe_after_cached_empty_count(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 0)
+        self.create_recipe(self.author, 'Борщ')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_low_count_does_not_truncate_pages(self):
+        for number in range(5):
+            self.create_recipe(self.author, f'Рецепт {number}')
+        with mock.patch(
+            'api.paginator.CustomPagination.get_count', return_value=1
+        ):
+            first = self.client.get(self.url)
+            last = self.client.get(f'{self.url}&page=3')
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertIsNotNone(first.data['next'])
+        self.assertEqual(first.data['count'], 3)
+        self.assertEqual(len(last.data['results']), 1)
+        self.assertIsNone(last.data['next'])
+        self.assertEqual(last.data['count'], 5)
+
+    def test_high_count_does_not_produce_empty_pages(self):
+        for number in range(3):
+            self.create_recipe(self.author, f'Рецепт {number}')
+        with mock.patch(
+            'api.paginator.CustomPagination.get_count', return_value=100
+        ):
+            second = self.client.get(f'{self.url}&page=2')
+            beyond = self.client.get(f'{self.url}&page=3')
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        self.assertEqual(second.data['count'], 3)
+        self.assertEqual(beyond.status_code, 404)
+
+
+class CursorTest(FoodgramTestCase):
+    """Значения курсора проверяются по типам полей сортировки."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('carol')
+        for number in range(3):
+            self.create_recipe(author, f'Рецепт {number}')
+
+    def get_with_cursor(self, position, ordering=''):
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(position).encode()
+        ).decode()
+        return self.client.get(
+            f'/api/recipes/?limit=1&cursor={cursor}{ordering}'
+        )
+
+    def test_cursor_follows_next_link(self):
+        response = self.client.get('/api/recipes/?limit=1&cursor=')
+        names = [response.data['results'][0]['name']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            names.extend(recipe['name'] for recipe in response.data['results'])
+        self.assertEqual(names, ['Рецепт 0', 'Рецепт 1', 'Рецепт 2'])
+
+    def test_invalid_cursor_values(self):
+        for position, ordering in (
+            ([None, 2], ''),
+            ([{'a': 1}, 2], ''),
+            (['Рецепт 0', [2]], ''),
+            (['x', 2], '&ordering=popular'),
+            ([0, 'x'], '&ordering=popular'),
+        ):
+            with self.subTest(position=position, ordering=ordering):
+                response = self.get_with_cursor(position, ordering)
+                self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=not-base64!')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.readers import RecipeReader
+from api.serializers import RecipeSerializer
+from recipes.models import (Favorite,
+                            Ingredient,
+                            Recipe,
+                            RecipeIngredient,
+                            ShoppingCart,
+                            Tag)
+from users.models import Subscribe
+from .base import FoodgramTestCase
+
+
+class RecipeReaderTest(FoodgramTestCase):
+    """RecipeReader отдаёт тот же JSON, что и RecipeSerializer."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('carol')
+        self.reader = self.create_user('dave')
+        tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#2dbd4f', 'breakfast'),
+                ('Обед', '#2d8fbd', 'dinner'),
+            )
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Свёкла', 'Капуста', 'Картофель')
+        ]
+        for number in range(3):
+            recipe = self.create_recipe(self.author, f'Рецепт {number}')
+            recipe.tags.set(tags[:number + 1])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+                for amount, ingredient in enumerate(ingredients[number:], 1)
+            ])
+        first = Recipe.objects.order_by('pk').first()
+        Favorite.objects.create(user=self.reader, recipe=first)
+        ShoppingCart.objects.create(user=self.reader, recipe=first)
+        Subscribe.objects.create(user=self.reader, author=self.author)
+
+    def test_same_json_as_serializer(self):
+        renderer = JSONRenderer()
+        for user in (AnonymousUser(), self.author, self.reader):
+            with self.subTest(user=user):
+                request = RequestFactory().get('/api/recipes/')
+                request.user = user
+                queryset = Recipe.objects.with_user_flags(user).order_by('pk')
+                expected = RecipeSerializer(
+                    queryset.with_related(),
+                    many=True,
+                    context={'request': request},
+                ).data
+                reader = RecipeReader(request)
+                actual = reader.represent(reader.values(queryset))
+                self.assertEqual(
+                    renderer.render(actual), renderer.render(expected)
+                )
+                self.assertEqual(
+                    actual[0]['is_favorited'], user == self.reader
+                )
@@ -0,0 +1,20 @@
+from .base import FoodgramTestCase
+
+
+class SearchTest(FoodgramTestCase):
+    """Поиск рецептов не зависит от регистра и для кириллицы."""
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('carol')
+        self.create_recipe(author, 'Борщ')
+        self.create_recipe(author, 'Суп', text='Почти как БОРЩ')
+
+    def test_search_ignores_case(self):
+        for query in ('борщ', 'Борщ', 'БОРЩ'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/recipes/?search={query}')
+                self.assertEqual(
+                    [recipe['name'] for recipe in response.data['results']],
+                    ['Борщ', 'Суп']
+                )
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+
+from foodgram.constants import (
+    TIMING_MAX_QUERIES,
+    TIMING_SAMPLE_RATE,
+    TIMING_SLOW_REQUEST_MS,
+)
+
+logger = logging.getLogger(__name__)
+# Замеры запроса, который обрабатывается в текущем контексте. Контекст
+# переходит в потоки sync_to_async, поэтому под ASGI учитываются и
+# запросы к базе из пула потоков.
+_current_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Замеры одного запроса: число SQL-запросов и длительности этапов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.durations = defaultdict(float)
+        self.action = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations['db'] += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - started
+
+    def milliseconds(self, name):
+        return round(self.durations[name] * 1000, 1)
+
+
+class TimedSerializer:
+    """Обёртка над сериализатором, которая засекает время serializer.data."""
+
+    def __init__(self, serializer, timing):
+        self._serializer = serializer
+        self._timing = timing
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        with self._timing.measure('serializer'):
+            return self._serializer.data
+
+
+def count_query(execute, sql, params, many, context):
+    """Обёртка соединений: передаёт запрос замерам текущего контекста."""
+    timing = _current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def get_timing(request):
+    """Замеры текущего запроса или None, если запрос не попал в выборку."""
+    return getattr(request, '_request_timing', None)
+
+
+class RequestTimingMiddleware(MiddlewareMixin):
+    """
+    Замеры запросов к API: число SQL-запросов, время в базе, в
+    сериализаторах, во вьюсете и общее время. Результат отдаётся в
+    заголовке Server-Timing и пишется в лог одной JSON-строкой.
+
+    Включается настройкой REQUEST_TIMING; замеряется только доля
+    запросов REQUEST_TIMING_SAMPLE_RATE, остальные проходят без
+    накладных расходов. Запросы дольше REQUEST_TIMING_SLOW_MS или
+    с числом SQL-запросов больше REQUEST_TIMING_MAX_QUERIES пишутся
+    в лог с уровнем WARNING.
+    """
+
+    path_prefix = '/api/'
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        connection_created.connect(install_query_counter)
+        for connection in connections.all():
+            install_query_counter(connection)
+        self.sample_rate = getattr(
+            settings, 'REQUEST_TIMING_SAMPLE_RATE', TIMING_SAMPLE_RATE
+        )
+        self.slow_ms = getattr(
+            settings, 'REQUEST_TIMING_SLOW_MS', TIMING_SLOW_REQUEST_MS
+        )
+        self.max_queries = getattr(
+            settings, 'REQUEST_TIMING_MAX_QUERIES', TIMING_MAX_QUERIES
+        )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.sampled(request):
+            return self.get_response(request)
+        timing = RequestTiming()
+        request._request_timing = timing
+        token = _current_timing.set(timing)
+        try:
+            with timing.measure('total'):
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        if not self.sampled(request):
+            return await self.get_response(request)
+        timing = RequestTiming()
+        request._request_timing = timing
+        token = _current_timing.set(timing)
+        try:
+            with timing.measure('total'):
+                response = await self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self.finish(request, response, timing)
+
+    def sampled(self, request):
+        return (
+            request.path.startswith(self.path_prefix)
+            and random.random() < self.sample_rate
+        )
+
+    def finish(self, request, response, timing):
+        response['Server-Timing'] = self.server_timing(timing)
+        self.log(request, response, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = get_timing(request)
+        if timing is None:
+            return None
+        view = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        if view is None:
+            timing.action = view_func.__name__
+        elif action is None:
+            timing.action = view.__name__
+        else:
+            timing.action = f'{view.__name__}.{action}'
+        return None
+
+    def server_timing(self, timing):
+        metrics = [
+            f'db;dur={timing.milliseconds("db")};'
+            f'desc="{timing.queries} queries"'
+        ]
+        for name in ('serializer', 'view', 'total'):
+            metrics.append(f'{name};dur={timing.milliseconds(name)}')
+        return ', '.join(metrics)
+
+    def log(self, request, response, timing):
+        total = timing.milliseconds('total')
+        slow = total > self.slow_ms
+        too_many_queries = timing.queries > self.max_queries
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'action': timing.action,
+            'status': response.status_code,
+            'queries': timing.queries,
+            'db_ms': timing.milliseconds('db'),
+            'serializer_ms': timing.milliseconds('serializer'),
+            'view_ms': timing.milliseconds('view'),
+            'total_ms': total,
+            'slow': slow,
+            'too_many_queries': too_many_queries,
+        }
+        logger.log(
+            logging.WARNING if slow or too_many_queries else logging.INFO,
+            json.dumps(record, ensure_ascii=False)
+        )
@@ -18,3 +18,32 @@ urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+
+def get_async_urlpatterns():
+    """
+    Маршруты ASGI-режима: теги, подсказки ингредиентов, рецепт и список
+    покупок обслуживаются асинхронными представлениями, остальное —
+    теми же вьюсетами, что и под WSGI.
+    """
+    from . import async_views
+
+    return [
+        path('tags/', async_views.tags_list, name='tags-list'),
+        path('tags/<int:pk>/', async_views.tags_detail, name='tags-detail'),
+        path(
+            'ingredients/',
+            async_views.ingredients_list,
+            name='ingredients-list'
+        ),
+        path(
+            'recipes/download_shopping_cart/',
+            async_views.download_shopping_cart,
+            name='recipes-download-shopping-cart'
+        ),
+        path(
+            'recipes/<int:pk>/',
+            async_views.recipes_detail,
+            name='recipes-detail'
+        ),
+    ] + urlpatterns
@@ -1,5 +1,10 @@
+import math
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
+
+from foodgram.constants import MAX_RECIPES_LIMIT
 
 
 def get_object_or_400(model, *args, **kwargs):
@@ -7,3 +12,48 @@ def get_object_or_400(model, *args, **kwargs):
         return get_object_or_404(model, *args, **kwargs)
     except model.DoesNotExist:
         raise NotFound(detail="Object not found", code=400)
+
+
+def get_query_limit(request, name, maximum):
+    """Проверяет параметр-ограничение и ограничивает его сверху."""
+    limit = request.query_params.get(name)
+    if not limit:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValidationError(
+            {name: 'Значение должно быть целым числом.'}
+        )
+    if limit < 0:
+        raise ValidationError(
+            {name: 'Значение не может быть отрицательным.'}
+        )
+    return min(limit, maximum)
+
+
+def get_recipes_limit(request):
+    """Проверяет параметр recipes_limit."""
+    return get_query_limit(request, 'recipes_limit', MAX_RECIPES_LIMIT)
+
+
+def percentile(values, share):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def stream_parts(response):
+    """
+    Части потокового ответа для асинхронного кода. Каждая часть читается
+    в потоке синхронного кода: генератор ответа может обращаться к ORM,
+    а в цикле событий это запрещено.
+    """
+    parts = iter(response)
+    read = sync_to_async(next, thread_sensitive=True)
+    while True:
+        part = await read(parts, None)
+        if part is None:
+            return
+        yield part
@@ -1,10 +1,15 @@
-from django.db.models import Sum
+from django.db.models import (BooleanField,
+                              OuterRef,
+                              Prefetch,
+                              Subquery,
+                              Value)
 from djoser import views as djoser_views
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (
     IsAuthenticated,
     AllowAny
@@ -16,15 +21,33 @@ from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
-    RecipeIngredient,
     ShoppingCart,
     Tag,
 )
+from recipes.bulk import add_recipe_relations, remove_recipe_relations
+from recipes.counters import change_counter
+from recipes.ingredient_index import ingredient_index
+from recipes.shopping_list import (
+    get_shopping_list,
+    invalidate_shopping_lists,
+)
 from users.models import User, Subscribe
+from foodgram.constants import MAX_INGREDIENTS_LIMIT
 from .filters import RecipeFilter
-from .paginator import CustomPagination
+from .mixins import AnonymousCacheMixin, CatalogCacheMixin, TimingMixin
+from .paginator import CustomPagination, KeysetPagination
 from .permissions import AutherOrReadOnly
+from .readers import RecipeReader
+from .relations import get_relations
+from .renderers import (
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+    ShoppingListTextRenderer,
+)
+from .timing import get_timing
+from .utils import get_query_limit, get_recipes_limit
 from .serializers import (
+    BulkRecipesSerializer,
     CreateRecipeSerializer,
     FavoriteSerializer,
     IngredientSerializer,
@@ -37,11 +60,12 @@ from .serializers import (
 )
 
 
-class UserViewSet(djoser_views.UserViewSet):
+class UserViewSet(TimingMixin, djoser_views.UserViewSet):
     """Вьюсет для пользователей."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = CustomPagination
+    cursor_ordering = ('username',)
 
     def get_permissions(self):
         if self.action in (
@@ -57,17 +81,28 @@ class UserViewSet(djoser_views.UserViewSet):
     @action(
         detail=False,
         methods=['get'],
-        url_path='subscriptions'
+        url_path='subscriptions',
+        serializer_class=SubscriptionSerializer
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(subscribing__user=user)
-        page = self.paginate_queryset(queryset)
-        serializer = SubscriptionSerializer(
-            page,
-            many=True,
-            context={'request': request}
+        preview = Recipe.objects.all()
+        limit = get_recipes_limit(request)
+        if limit is not None:
+            preview = preview.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:limit]
+            ))
+        queryset = User.objects.filter(
+            subscribing__user=user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).order_by('username').prefetch_related(
+            Prefetch('recipes', queryset=preview, to_attr='preview_recipes')
         )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
     @action(
@@ -93,6 +128,7 @@ class UserViewSet(djoser_views.UserViewSet):
                 user=user,
                 author=author
             )
+            get_relations(request).invalidate(Subscribe)
             if not created:
                 return Response(
                     {'error': 'Вы уже подписаны на этого автора!'},
@@ -106,43 +142,80 @@ class UserViewSet(djoser_views.UserViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         subscription.delete()
+        get_relations(request).invalidate(Subscribe)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+class IngredientsViewSet(
+    TimingMixin, CatalogCacheMixin, ReadOnlyModelViewSet
+):
     """Вьюсет для ингредиентов."""
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all().order_by('pk')
 
     def list(self, request, *args, **kwargs):
-        name_starts_with = request.query_params.get('name', '')
-        queryset = self.queryset
-        if name_starts_with:
-            queryset = queryset.filter(name__istartswith=name_starts_with)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        limit = get_query_limit(request, 'limit', MAX_INGREDIENTS_LIMIT)
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''),
+            limit
+        ))
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(
+    TimingMixin, AnonymousCacheMixin, viewsets.ModelViewSet
+):
     """Вьюсет для рецептов."""
     permission_classes = (AutherOrReadOnly,)
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer('search_vector')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     serializer_class = RecipeSerializer
     pagination_class = CustomPagination
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        author_id = self.request.query_params.get('author')
-        tags = self.request.query_params.getlist('tags')
-        if author_id:
-            queryset = queryset.filter(author_id=author_id)
-        if tags:
-            tag_filters = {'tags__slug__in': tags}
-            queryset = queryset.filter(**tag_filters)
+        queryset = super().get_queryset().with_user_flags(self.request.user)
+        if self.request.method == 'GET':
+            queryset = queryset.with_related()
+        else:
+            queryset = queryset.select_related('author')
         return queryset
 
+    def represent(self, rows):
+        """Представление рецептов через RecipeReader вместо сериализатора."""
+        reader = RecipeReader(self.request)
+        timing = get_timing(self.request)
+        if timing is None:
+            return reader.represent(rows)
+        with timing.measure('serializer'):
+            return reader.represent(rows)
+
+    def list_recipes(self, queryset):
+        rows = RecipeReader(self.request).values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(self.represent(rows))
+        return self.get_paginated_response(self.represent(page))
+
+    def list(self, request, *args, **kwargs):
+        return self.list_recipes(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        row = get_object_or_404(
+            RecipeReader(request).values(
+                self.filter_queryset(self.get_queryset())
+            ),
+            pk=kwargs['pk']
+        )
+        return Response(self.represent([row])[0])
+
+    @property
+    def cursor_ordering(self):
+        if self.action == 'feed':
+            return ('-id',)
+        if self.request.query_params.get('ordering') == 'popular':
+            return ('-favorites_count', 'id')
+        return ('name', 'id')
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
@@ -177,6 +250,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            get_relations(request).invalidate(model_class)
             return Response(
                 serializer.data,
                 status=status.HTTP_201_CREATED
@@ -187,6 +261,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
                 recipe=recipe
             )
             instance.delete()
+            get_relations(request).invalidate(model_class)
             return Response(
                 status=status.HTTP_204_NO_CONTENT
             )
@@ -196,6 +271,55 @@ class RecipesViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    def bulk_action_request(self, request, model_class, counter_field):
+        """
+        Добавляет или удаляет несколько рецептов за один запрос и
+        возвращает результат для каждого id.
+        """
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        with transaction.atomic():
+            existing = set(Recipe.objects.filter(
+                pk__in=recipe_ids
+            ).values_list('pk', flat=True))
+            relations = model_class.objects.filter(
+                user=request.user,
+                recipe_id__in=existing
+            )
+            present = set(relations.values_list('recipe_id', flat=True))
+            if request.method == 'POST':
+                done = add_recipe_relations(
+                    model_class, request.user.id, existing - present
+                )
+                delta = 1
+                statuses = ('created', 'exists')
+            else:
+                done = remove_recipe_relations(
+                    model_class, request.user.id, present
+                )
+                delta = -1
+                statuses = ('deleted', 'not_in_list')
+            change_counter(
+                Recipe.objects.filter(pk__in=done), counter_field, delta
+            )
+            if model_class is ShoppingCart and done:
+                transaction.on_commit(
+                    lambda: invalidate_shopping_lists(request.user.id)
+                )
+        get_relations(request).invalidate(model_class)
+        return Response({'results': [
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in existing
+                    else statuses[0] if recipe_id in done
+                    else statuses[1]
+                ),
+            }
+            for recipe_id in recipe_ids
+        ]})
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -210,54 +334,61 @@ class RecipesViewSet(viewsets.ModelViewSet):
             pk
         )
 
-    def generate_shopping_list(self, user):
-        recipes = ShoppingCart.objects.filter(
-            user=user
-        ).values_list('recipe', flat=True)
-
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__in=recipes)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(
-                total_amount=Sum('amount')
-            )
-        )
-
-        shopping_list = {}
-        for ingredient in ingredients:
-            ingredient_name = ingredient['ingredient__name']
-            total_amount = ingredient['total_amount']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            shopping_list[ingredient_name] = {
-                'amount': total_amount,
-                'measurement_unit': measurement_unit
-            }
-
-        return shopping_list
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_action_request(request, ShoppingCart, 'carts_count')
 
     @action(
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
-
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListJSONRenderer,
+        ),
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping_list = self.generate_shopping_list(user)
-        shopping_list_text = ''
-        for ingredient, data in shopping_list.items():
-            shopping_list_text += (f"{ingredient} "
-                                   f"({data['measurement_unit']}) "
-                                   f"— {data['amount']}\n")
-        response = HttpResponse(
-            shopping_list_text,
-            content_type='text/plain'
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(get_shopping_list(request.user)),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
-        response[
-            'Content-Disposition'] = 'attachment; filename="shopping_list.txt"'
-
         return response
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_action_request(request, Favorite, 'favorites_count')
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+        permission_classes=(IsAuthenticated,),
+        pagination_class=KeysetPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        return self.list_recipes(self.get_queryset().filter(
+            feed_entries__user=request.user
+        ))
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -273,7 +404,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
         )
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(TimingMixin, CatalogCacheMixin, ReadOnlyModelViewSet):
     """Вьюсет для тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
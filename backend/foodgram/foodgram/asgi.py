@@ -1,7 +1,53 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
-application = get_asgi_application()
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django 3.2 читает потоковый ответ прямо в цикле событий, где нельзя
+    обращаться к ORM, а выгрузка списка покупок читает базу по мере
+    отдачи. Здесь каждая часть ответа читается в потоке синхронного кода
+    и сразу отправляется клиенту, без сборки тела в памяти.
+    """
+
+    async def send_response(self, response, send):
+        from api.utils import stream_parts
+
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str) else header,
+                value.encode('latin1') if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            headers.append(
+                (b'Set-Cookie', cookie.output(header='').encode().strip())
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        async for part in stream_parts(response):
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+django.setup(set_prefix=False)
+application = StreamingASGIHandler()
@@ -6,3 +6,30 @@ MAX_COLOR_LENGTH = 16  # Максимальная длина цвета
 MIN_VALUE = 1  # Минимальное значение
 message = 'Значение должно быть не менее 1 минуты'
 MAX_USERNAME_LENGTH = 150  # Максимальная длина имени пользователя
+MAX_RECIPES_LIMIT = 100  # Максимальное число рецептов в превью подписки
+MAX_INGREDIENTS_LIMIT = 100  # Максимальное число подсказок ингредиентов
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24  # Время хранения списка покупок
+IMAGE_THUMBNAIL_SIZE = (480, 480)  # Размер превью рецепта в списке
+IMAGE_DETAIL_SIZE = (1200, 1200)  # Размер изображения на странице рецепта
+BACKGROUND_WORKERS = 2  # Число потоков для фоновых задач
+COUNT_CACHE_TIMEOUT = 30  # Время хранения числа объектов в списке, секунды
+COUNT_ESTIMATE_THRESHOLD = 10000  # С какого размера таблицы брать оценку
+SEARCH_CONFIG = 'russian'  # Конфигурация полнотекстового поиска PostgreSQL
+FEED_BATCH_SIZE = 1000  # Размер пачки записей ленты при рассылке
+FEED_BACKFILL_LIMIT = 100  # Сколько рецептов автора добавить в ленту
+MAX_BULK_RECIPES = 100  # Максимум рецептов в одном групповом запросе
+BULK_BATCH_SIZE = 1000  # Размер пачки при загрузке справочников
+TIMING_SAMPLE_RATE = 1.0  # Доля запросов, для которых собираются замеры
+TIMING_SLOW_REQUEST_MS = 500  # Порог времени медленного запроса, мс
+TIMING_MAX_QUERIES = 30  # Порог числа SQL-запросов на один запрос к API
+DATASET_USERNAME_PREFIX = 'bench'  # Префикс пользователей тестового набора
+DATASET_PASSWORD = 'bench-password-1'  # Пароль пользователей тестового набора
+BENCHMARK_ITERATIONS = 20  # Число замеров каждого запроса в бенчмарке
+BENCHMARK_TOLERANCE = 0.2  # Допустимый рост p95 относительно эталона
+RECIPES_CACHE_TIMEOUT = 60  # Время жизни кэша ответов о рецептах, с
+CACHE_LOCK_TIMEOUT = 10  # Время жизни блокировки пересчёта ответа, с
+CACHE_WAIT_TIMEOUT = 2  # Сколько ждать ответа, который считает другой запрос
+RECIPES_CACHE_STALE_TIMEOUT = 60 * 10  # Сколько хранить устаревший ответ, с
+TOKEN_CACHE_SIZE = 1024  # Число токенов в кэше процесса
+TOKEN_CACHE_TIMEOUT = 30  # Время жизни токена в кэше, с
+PRIMARY_STICKY_TIMEOUT = 10  # Сколько читать с основной базы после записи, с
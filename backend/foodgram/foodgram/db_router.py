@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+PRIMARY_DATABASE = 'default'
+PRIMARY_PIN_KEY = 'db-primary:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Разрешено ли текущему запросу читать с реплики. По умолчанию нет:
+# команды, фоновые задачи и запросы на запись работают с основной базой.
+_replica_allowed = ContextVar('replica_allowed', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Читать с основной базы внутри блока, например при заполнении кэша."""
+    token = _replica_allowed.set(False)
+    try:
+        yield
+    finally:
+        _replica_allowed.reset(token)
+
+
+def get_pin_key(credentials):
+    """Ключ кэша, закрепляющего клиента за основной базой."""
+    return PRIMARY_PIN_KEY.format(
+        hashlib.md5(credentials.encode()).hexdigest()
+    )
+
+
+@contextmanager
+def allow_replica():
+    """Разрешить чтение с реплик внутри блока."""
+    token = _replica_allowed.set(True)
+    try:
+        yield
+    finally:
+        _replica_allowed.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Чтение — с одной из реплик REPLICA_DATABASES, если запрос разрешил
+    это через ReplicaRoutingMiddleware; запись и всё остальное — с
+    основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if replicas and _replica_allowed.get():
+            return random.choice(replicas)
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DATABASE, *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Разрешает чтение с реплик для безопасных запросов к API.
+
+    После запроса на запись клиент (по токену или сессии) читает с
+    основной базы ещё PRIMARY_STICKY_TIMEOUT секунд, чтобы сразу
+    увидеть свои изменения, даже если реплика отстаёт.
+    """
+
+    path_prefix = '/api/'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.timeout = settings.PRIMARY_STICKY_TIMEOUT
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+        key = self.get_client_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            self.pin(key)
+            return response
+        if self.is_pinned(key):
+            return self.get_response(request)
+        with allow_replica():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+        key = self.get_client_key(request)
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            await sync_to_async(self.pin, thread_sensitive=False)(key)
+            return response
+        if await sync_to_async(self.is_pinned, thread_sensitive=False)(
+            key
+        ):
+            return await self.get_response(request)
+        with allow_replica():
+            return await self.get_response(request)
+
+    def applies(self, request):
+        return bool(settings.REPLICA_DATABASES) and request.path.startswith(
+            self.path_prefix
+        )
+
+    def pin(self, key):
+        if key is not None:
+            cache.set(key, True, self.timeout)
+
+    def is_pinned(self, key):
+        return key is not None and bool(cache.get(key))
+
+    def get_client_key(self, request):
+        """Ключ закрепления клиента по токену или сессии."""
+        credentials = request.META.get('HTTP_AUTHORIZATION') or (
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credentials:
+            return None
+        return get_pin_key(credentials)
@@ -1,6 +1,14 @@
 import os
+import tempfile
 from pathlib import Path
 
+from foodgram.constants import (
+    PRIMARY_STICKY_TIMEOUT,
+    TIMING_MAX_QUERIES,
+    TIMING_SAMPLE_RATE,
+    TIMING_SLOW_REQUEST_MS,
+)
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 APP_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.timing.RequestTimingMiddleware',
+    'foodgram.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,7 +49,9 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'backend_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-ROOT_URLCONF = 'foodgram.urls'
+# ASGI-режим: асинхронные представления для части эндпоинтов API.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == 'True'
+ROOT_URLCONF = 'foodgram.urls_async' if ASYNC_VIEWS else 'foodgram.urls'
 
 TEMPLATES = [
     {
@@ -71,6 +83,63 @@ DATABASES = {
     }
 }
 
+# Локальный запуск на SQLite: SQLITE_DB — путь к файлу основной базы.
+if os.getenv('SQLITE_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_DB'),
+    }
+
+# Реплики для чтения: DB_REPLICA_HOSTS — хосты PostgreSQL через пробел,
+# DB_REPLICA_NAMES — имена баз (для SQLite — пути к файлам) через пробел.
+REPLICA_DATABASES = []
+for number, replica in enumerate(
+    [{'HOST': host} for host in os.getenv('DB_REPLICA_HOSTS', '').split()]
+    + [{'NAME': name} for name in os.getenv('DB_REPLICA_NAMES', '').split()],
+    1
+):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'], TEST={'MIRROR': 'default'}, **replica
+    )
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['foodgram.db_router.ReadReplicaRouter']
+PRIMARY_STICKY_TIMEOUT = int(
+    os.getenv('PRIMARY_STICKY_TIMEOUT', PRIMARY_STICKY_TIMEOUT)
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'foodgram_cache')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Кэш ответов о рецептах для анонимных запросов. Подходит любой бэкенд
+    # кэша Django: память процесса, файлы, Memcached или сервер
+    # с протоколом Redis через соответствующий пакет.
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'responses'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+# Алиас общего кэша токенов и версий их отзыва; пустое значение оставляет
+# только кэш процесса, и отзыв токена виден лишь одному процессу.
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', 'default') or None
+
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -106,7 +175,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
         'api.paginator.CustomPagination',
@@ -119,3 +188,25 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+REQUEST_TIMING = os.getenv('REQUEST_TIMING') == 'True'
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', TIMING_SAMPLE_RATE)
+)
+REQUEST_TIMING_SLOW_MS = int(
+    os.getenv('REQUEST_TIMING_SLOW_MS', TIMING_SLOW_REQUEST_MS)
+)
+REQUEST_TIMING_MAX_QUERIES = int(
+    os.getenv('REQUEST_TIMING_MAX_QUERIES', TIMING_MAX_QUERIES)
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -0,0 +1,8 @@
+from django.urls import include, path
+
+from api.urls import get_async_urlpatterns
+from foodgram.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include(get_async_urlpatterns())),
+] + sync_urlpatterns
@@ -7,6 +7,46 @@ from recipes.models import (Recipe,
                             ShoppingCart)
 
 
+class InputFilter(admin.SimpleListFilter):
+    """
+    Фильтр с полем ввода вместо списка значений: не перебирает всех
+    пользователей на каждой странице списка.
+    """
+
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        return queryset.filter(**{self.lookup: value.strip()})
+
+
+class AuthorFilter(InputFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    lookup = 'author__username'
+
+
+class UserFilter(InputFilter):
+    title = 'пользователю'
+    parameter_name = 'user'
+    lookup = 'user__username'
+
+
 class TagAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'color', 'slug',)
     search_fields = ('name', 'slug',)
@@ -19,7 +59,7 @@ class IngredientAdmin(admin.ModelAdmin):
         'measurement_unit',
     )
     search_fields = ('name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     list_display_links = ('name',)
 
 
@@ -31,8 +71,14 @@ class IngredientInline(admin.TabularInline):
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 0
+    autocomplete_fields = ('ingredient',)
     readonly_fields = ('ingredient_measurement_unit',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
+
     def ingredient_measurement_unit(self, instance):
         return instance.ingredient.measurement_unit
 
@@ -43,13 +89,29 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'name',
         'author',
+        'favorites',
     )
+    list_select_related = ('author',)
     search_fields = ('name',)
-    list_filter = ('author', 'name', 'tags',)
+    list_filter = (AuthorFilter, 'tags',)
     list_display_links = ('name',)
+    autocomplete_fields = ('author',)
     inlines = [
         RecipeIngredientInline, ]
     filter_vertical = ('tags',)
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
+    @admin.display(description='В избранном', ordering='favorites_count')
+    def favorites(self, obj):
+        return obj.favorites_count
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -57,9 +119,12 @@ class FavoriteAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    list_filter = (UserFilter,)
     list_display_links = ('user',)
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 class ShoppingCartAdmin(admin.ModelAdmin):
@@ -67,9 +132,12 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    list_filter = (UserFilter,)
     list_display_links = ('user',)
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 """Регистрируем кастомное представление админ-зоны"""
@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from foodgram.constants import BACKGROUND_WORKERS
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=BACKGROUND_WORKERS, thread_name_prefix='foodgram'
+)
+# Список, куда submit складывает задачи вместо пула, если задан defer().
+_deferred = ContextVar('background_deferred', default=None)
+
+
+def run(function, *args):
+    """Выполняет function в пуле потоков и закрывает соединения с БД."""
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Ошибка фоновой задачи %s', function.__name__)
+    finally:
+        connections.close_all()
+
+
+def submit(function, *args):
+    """Ставит задачу в пул фоновых потоков."""
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.append((function, args))
+        return None
+    return executor.submit(run, function, *args)
+
+
+@contextmanager
+def defer():
+    """
+    Копит задачи внутри блока в списке вместо пула, чтобы вызывающий
+    выполнил их сам в своём потоке и транзакции, например в бенчмарке.
+    """
+    tasks = []
+    token = _deferred.set(tasks)
+    try:
+        yield tasks
+    finally:
+        _deferred.reset(token)
@@ -0,0 +1,144 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import connections, router, transaction
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_json_array(file):
+    """Читает JSON-массив объектов по частям, не загружая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        chunk = file.read(JSON_CHUNK_SIZE)
+        buffer = (buffer + chunk).lstrip()
+        if not started:
+            if not buffer:
+                if not chunk:
+                    return
+                continue
+            if buffer[0] != '[':
+                raise ValueError('Ожидается JSON-массив')
+            buffer = buffer[1:]
+            started = True
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            yield item
+            buffer = buffer[end:]
+        if not chunk:
+            raise ValueError('Неожиданный конец JSON-файла')
+
+
+def iter_csv_rows(file, fields):
+    """Читает строки CSV без заголовка или с заголовком из fields."""
+    for row in csv.reader(file):
+        if not row or list(row) == list(fields):
+            continue
+        yield dict(zip(fields, (value.strip() for value in row)))
+
+
+def bulk_insert(model, rows, unique_fields, batch_size, dry_run=False):
+    """
+    Добавляет строки пачками через bulk_create(ignore_conflicts=True)
+    в одной транзакции и возвращает число добавленных и пропущенных.
+    При dry_run строки тоже вставляются, но транзакция откатывается.
+
+    Число добавленных считается по таблице до и после загрузки:
+    ignore_conflicts молча пропускает и строки, нарушающие другие
+    ограничения уникальности, кроме unique_fields.
+    """
+    seen = set()
+    total = 0
+    with transaction.atomic():
+        count_before = model.objects.count()
+        for batch in batched(rows, batch_size):
+            total += len(batch)
+            fresh = {}
+            for row in batch:
+                key = tuple(row[field] for field in unique_fields)
+                if key not in seen:
+                    seen.add(key)
+                    fresh[key] = row
+            if not fresh:
+                continue
+            first = unique_fields[0]
+            existing = set(model.objects.filter(**{
+                f'{first}__in': {row[first] for row in fresh.values()}
+            }).values_list(*unique_fields))
+            new = [row for key, row in fresh.items() if key not in existing]
+            if new:
+                model.objects.bulk_create(
+                    [model(**row) for row in new],
+                    batch_size=batch_size,
+                    ignore_conflicts=True
+                )
+        inserted = model.objects.count() - count_before
+        if dry_run:
+            transaction.set_rollback(True)
+    return inserted, total - inserted
+
+
+def _execute_returning(model, sql, params):
+    connection = connections[router.db_for_write(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _relation_columns(model):
+    quote = connections[router.db_for_write(model)].ops.quote_name
+    return (
+        quote(model._meta.db_table),
+        quote(model._meta.get_field('user').column),
+        quote(model._meta.get_field('recipe').column),
+    )
+
+
+def add_recipe_relations(model, user_id, recipe_ids):
+    """
+    Добавляет связи пользователя с рецептами (избранное, корзина) и
+    возвращает id рецептов, для которых строка действительно вставлена:
+    строки, которые успел вставить параллельный запрос, не учитываются.
+    """
+    if not recipe_ids:
+        return set()
+    table, user, recipe = _relation_columns(model)
+    values = ', '.join(['(%s, %s)'] * len(recipe_ids))
+    return _execute_returning(
+        model,
+        f'INSERT INTO {table} ({user}, {recipe}) VALUES {values} '
+        f'ON CONFLICT DO NOTHING RETURNING {recipe}',
+        [value for recipe_id in recipe_ids for value in (user_id, recipe_id)]
+    )
+
+
+def remove_recipe_relations(model, user_id, recipe_ids):
+    """Удаляет связи и возвращает id рецептов, для которых они были."""
+    if not recipe_ids:
+        return set()
+    table, user, recipe = _relation_columns(model)
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    return _execute_returning(
+        model,
+        f'DELETE FROM {table} WHERE {user} = %s '
+        f'AND {recipe} IN ({placeholders}) RETURNING {recipe}',
+        [user_id, *recipe_ids]
+    )
@@ -0,0 +1,76 @@
+import time
+
+from django.core.cache import cache
+
+from foodgram.db_router import use_primary
+
+CATALOG_VERSION_KEY = 'recipes:catalog-version'
+RECIPES_VERSION_KEY = 'recipes:recipes-version'
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """
+    Версия данных, хранимая в кэше под ключом key.
+
+    Версия — отметка времени в миллисекундах, поэтому после потери ключа
+    в кэше она всё равно не повторяет прежние значения.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = _now()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """Увеличивает версию данных после их изменения."""
+    version = max(_now(), get_version(key) + 1)
+    cache.set(key, version, None)
+    return version
+
+
+def get_catalog_version():
+    """Версия справочников (теги и ингредиенты)."""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def get_recipes_version():
+    """
+    Версия рецептов: меняется при изменении рецептов, их состава, тегов
+    и авторов.
+    """
+    return get_version(RECIPES_VERSION_KEY)
+
+
+def bump_recipes_version():
+    return bump_version(RECIPES_VERSION_KEY)
+
+
+class TagIds:
+    """Соответствие слагов тегов их id, обновляемое по версии справочников."""
+
+    def __init__(self):
+        self._version = None
+        self._ids = {}
+
+    def get(self, slugs):
+        version = get_catalog_version()
+        if self._version != version:
+            from recipes.models import Tag
+
+            with use_primary():
+                self._ids = dict(Tag.objects.values_list('slug', 'id'))
+            self._version = version
+        return {self._ids[slug] for slug in slugs if slug in self._ids}
+
+
+tag_ids = TagIds()
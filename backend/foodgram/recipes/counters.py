@@ -0,0 +1,108 @@
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+
+# Объекты, которые сейчас удаляются вместе со ссылками на них: счётчики,
+# связанные с ними, обрабатываются целиком, а не по строке каскада.
+_deleting = ContextVar('counters_deleting', default=frozenset())
+
+
+def remember_references(instance, *fields):
+    """
+    Запоминает значения ссылок сохранённого объекта до сохранения, чтобы
+    после него заметить перенос на другой объект.
+    """
+    instance._references_before = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._references_before = type(instance).objects.filter(
+            pk=instance.pk
+        ).values(*fields).first()
+
+
+def counter_changes(instance, field, signal, created=False, **kwargs):
+    """
+    Изменения счётчиков объектов, на которые ссылается field, по сигналу:
+    +1 при создании, -1 при удалении, -1 прежнему и +1 новому объекту
+    при переносе ссылки.
+    """
+    current = getattr(instance, field)
+    if signal is post_delete:
+        return [(current, -1)]
+    if created:
+        return [(current, 1)]
+    previous = (
+        getattr(instance, '_references_before', None) or {}
+    ).get(field, current)
+    if previous == current:
+        return []
+    return [(previous, -1), (current, 1)]
+
+
+def update_counter(model, counter, instance, field, **kwargs):
+    """Меняет счётчик counter объектов model по сигналу об instance."""
+    for pk, delta in counter_changes(instance, field, **kwargs):
+        if pk is not None:
+            change_counter(model.objects.filter(pk=pk), counter, delta)
+
+
+def start_deletion(instance):
+    """Отмечает объект, удаление которого начинается (pre_delete)."""
+    _deleting.set(_deleting.get() | {(instance._meta.label, instance.pk)})
+
+
+def finish_deletion(instance):
+    """Снимает отметку после удаления объекта (post_delete)."""
+    _deleting.set(_deleting.get() - {(instance._meta.label, instance.pk)})
+
+
+def clear_deletions(**kwargs):
+    """Сбрасывает отметки, оставшиеся от прерванного удаления."""
+    _deleting.set(frozenset())
+
+
+def is_deleting(model, pk, using):
+    """
+    Удаляется ли сейчас объект model с ключом pk. Отметка учитывается
+    только внутри транзакции, а отметки прерванного удаления
+    сбрасываются в конце запроса.
+    """
+    return (
+        (model._meta.label, pk) in _deleting.get()
+        and connections[using].in_atomic_block
+    )
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно меняет счётчик field на delta через F()."""
+    if not delta:
+        return
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_of(queryset, field):
+    """Подзапрос с числом строк queryset, ссылающихся на объект."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def recount_counters(recipe, favorite, shopping_cart, user, subscribe):
+    """Пересчитывает счётчики рецептов и пользователей."""
+    recipe.objects.update(
+        favorites_count=count_of(favorite.objects.all(), 'recipe'),
+        carts_count=count_of(shopping_cart.objects.all(), 'recipe'),
+    )
+    user.objects.update(
+        recipes_count=count_of(recipe.objects.all(), 'author'),
+        subscribers_count=count_of(subscribe.objects.all(), 'author'),
+    )
@@ -0,0 +1,72 @@
+from django.db import connections, router
+
+from foodgram.constants import FEED_BACKFILL_LIMIT, FEED_BATCH_SIZE
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe
+
+
+def insert_feed_entries(condition, params):
+    """
+    Вставляет записи ленты одним INSERT ... SELECT из подписок,
+    соединённых с рецептами их авторов.
+
+    Запись появляется, только если подписка существует в момент вставки:
+    отписка, случившаяся раньше фоновой задачи, не оставит в ленте
+    рецептов. На PostgreSQL строки подписок блокируются FOR SHARE, и
+    параллельная отписка дождётся вставки, а затем удалит её записи.
+    """
+    connection = connections[router.db_for_write(FeedEntry)]
+    quote = connection.ops.quote_name
+    column = {
+        name: quote(FeedEntry._meta.get_field(name).column)
+        for name in ('user', 'recipe', 'author')
+    }
+    lock = ' FOR SHARE OF s' if connection.vendor == 'postgresql' else ''
+    sql = (
+        f'INSERT INTO {quote(FeedEntry._meta.db_table)} '
+        f'({column["user"]}, {column["recipe"]}, {column["author"]}) '
+        f'SELECT s.user_id, r.id, r.author_id '
+        f'FROM {quote(Subscribe._meta.db_table)} s '
+        f'INNER JOIN {quote(Recipe._meta.db_table)} r '
+        f'ON r.author_id = s.author_id '
+        f'WHERE {condition}{lock} ON CONFLICT DO NOTHING'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def fan_out_recipe(recipe_id, author_id):
+    """Добавляет новый рецепт в ленты подписчиков автора пачками."""
+    subscribers = Subscribe.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True).order_by('user_id')
+    last_user_id = 0
+    while True:
+        batch = list(
+            subscribers.filter(user_id__gt=last_user_id)[:FEED_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        insert_feed_entries(
+            'r.id = %s AND s.author_id = %s '
+            'AND s.user_id > %s AND s.user_id <= %s',
+            [recipe_id, author_id, last_user_id, batch[-1]]
+        )
+        last_user_id = batch[-1]
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    recent = Recipe.objects.filter(
+        author_id=author_id
+    ).order_by('-id').values('id')[:FEED_BACKFILL_LIMIT]
+    recent, params = recent.query.sql_with_params()
+    insert_feed_entries(
+        f's.user_id = %s AND s.author_id = %s AND r.id IN ({recent})',
+        [user_id, author_id, *params]
+    )
+
+
+def remove_from_feed(user_id, author_id):
+    """Убирает рецепты автора из ленты после отписки."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,77 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from foodgram.constants import IMAGE_DETAIL_SIZE, IMAGE_THUMBNAIL_SIZE
+from recipes import background
+from recipes.catalog import bump_recipes_version
+
+IMAGE_VARIANTS = {
+    'thumbnail': (IMAGE_THUMBNAIL_SIZE, 'JPEG', 'jpg'),
+    'detail': (IMAGE_DETAIL_SIZE, 'JPEG', 'jpg'),
+    'webp': (IMAGE_DETAIL_SIZE, 'WEBP', 'webp'),
+}
+
+
+def render_variants(name):
+    """Сохраняет уменьшенные копии изображения и возвращает их имена."""
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    directory, filename = posixpath.split(name)
+    root = posixpath.splitext(filename)[0]
+    variants = {}
+    for variant, (size, image_format, extension) in IMAGE_VARIANTS.items():
+        copy = image.copy()
+        copy.thumbnail(size, Image.LANCZOS)
+        if image_format == 'JPEG' and copy.mode != 'RGB':
+            copy = copy.convert('RGB')
+        buffer = BytesIO()
+        copy.save(buffer, image_format, quality=85)
+        variants[variant] = default_storage.save(
+            posixpath.join(
+                directory, 'variants', f'{root}.{variant}.{extension}'
+            ),
+            ContentFile(buffer.getvalue())
+        )
+    return variants
+
+
+def delete_variants(variants):
+    """Удаляет файлы копий изображения."""
+    for name in variants.values():
+        default_storage.delete(name)
+
+
+def process_recipe_image(recipe_id, name):
+    """
+    Строит копии изображения и записывает их в рецепт. Если изображение
+    рецепта успели заменить, копии удаляются.
+    """
+    from recipes.models import Recipe
+
+    variants = render_variants(name)
+    if Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants
+    ):
+        bump_recipes_version()
+    else:
+        delete_variants(variants)
+
+
+def schedule_recipe_image(recipe, previous_variants=None):
+    """
+    Ставит обработку изображения рецепта в пул потоков, а копии
+    прежнего изображения — на удаление.
+    """
+    if previous_variants:
+        background.submit(delete_variants, previous_variants)
+    if recipe.image:
+        background.submit(
+            process_recipe_image, recipe.pk, recipe.image.name
+        )
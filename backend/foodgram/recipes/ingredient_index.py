@@ -0,0 +1,87 @@
+import threading
+from bisect import bisect_left
+
+from foodgram.db_router import use_primary
+from recipes.catalog import get_catalog_version
+
+
+def fold(value):
+    """Приводит строку к виду для сравнения без учёта регистра и ё."""
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Строится лениво при первом поиске после смены версии справочников,
+    поэтому изменения видны во всех процессах.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._state = ((), (), ())
+        self._ids = frozenset()
+
+    def existing_ids(self, ids):
+        """
+        Возвращает те из ids, что есть в справочнике, или None, если
+        индекс в этом процессе ещё не построен или устарел.
+        """
+        if self._version != get_catalog_version():
+            return None
+        return self._ids.intersection(ids)
+
+    def _ensure_built(self):
+        version = get_catalog_version()
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            from recipes.models import Ingredient
+
+            with use_primary():
+                rows = tuple(
+                    Ingredient.objects.order_by('pk').values(
+                        'id', 'name', 'measurement_unit'
+                    )
+                )
+            ordered = sorted(
+                rows, key=lambda row: (fold(row['name']), row['id'])
+            )
+            self._state = (
+                rows,
+                tuple(fold(row['name']) for row in ordered),
+                tuple(ordered),
+            )
+            self._ids = frozenset(row['id'] for row in rows)
+            self._version = version
+
+    def search(self, query='', limit=None):
+        """
+        Возвращает ингредиенты, название которых начинается с query,
+        а за ними — содержащие query в середине названия.
+        """
+        self._ensure_built()
+        rows, keys, ordered = self._state
+        if not query:
+            return list(rows[:limit])
+        key = fold(query)
+        result = []
+        index = bisect_left(keys, key)
+        while index < len(keys) and keys[index].startswith(key):
+            if limit is not None and len(result) >= limit:
+                return result
+            result.append(ordered[index])
+            index += 1
+        for name, row in zip(keys, ordered):
+            if limit is not None and len(result) >= limit:
+                break
+            if key in name and not name.startswith(key):
+                result.append(row)
+        return result
+
+
+ingredient_index = IngredientIndex()
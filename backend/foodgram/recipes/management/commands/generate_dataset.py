@@ -0,0 +1,233 @@
+import io
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from PIL import Image
+
+from foodgram.constants import (
+    BULK_BATCH_SIZE,
+    DATASET_PASSWORD,
+    DATASET_USERNAME_PREFIX,
+    MAX_FIELD_LENGTH,
+)
+from recipes.catalog import bump_recipes_version
+from recipes.counters import recount_counters
+from recipes.models import (Favorite,
+                            FeedEntry,
+                            Ingredient,
+                            Recipe,
+                            RecipeIngredient,
+                            ShoppingCart,
+                            Tag,
+                            recipe_search_vector)
+from users.models import Subscribe
+
+User = get_user_model()
+
+IMAGE_NAME = 'recipes/images/benchmark.jpg'
+DISHES = ('Салат', 'Суп', 'Рагу', 'Пирог', 'Запеканка', 'Омлет', 'Паста')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сгенерировать воспроизводимый набор данных: пользователей, '
+        'рецепты, избранное, корзины и подписки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--recipes', type=int, default=500,
+            help='Общее число рецептов',
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=6,
+            help='Ингредиентов в рецепте',
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Рецептов в избранном у пользователя',
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Рецептов в корзине у пользователя',
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Подписок у пользователя',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить ранее сгенерированных пользователей и их данные',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        generated = User.objects.filter(
+            username__startswith=DATASET_USERNAME_PREFIX
+        )
+        if options['clear']:
+            generated.delete()
+        elif generated.exists():
+            raise CommandError(
+                'Набор данных уже создан; используйте --clear'
+            )
+        if not Tag.objects.exists():
+            call_command('load_data_tag', stdout=io.StringIO())
+        if not Ingredient.objects.exists():
+            call_command('load_data_ingrediend', stdout=io.StringIO())
+        self.save_image()
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            recipes = self.create_recipes(
+                users, options['recipes'], options['ingredients']
+            )
+            recipe_ids = [pk for ids in recipes.values() for pk in ids]
+            self.create_relations(
+                Favorite, users, recipe_ids, options['favorites']
+            )
+            self.create_relations(
+                ShoppingCart, users, recipe_ids, options['carts']
+            )
+            self.create_subscriptions(
+                users, recipes, options['subscriptions']
+            )
+            recount_counters(Recipe, Favorite, ShoppingCart, User, Subscribe)
+            if connection.vendor == 'postgresql':
+                Recipe.objects.filter(pk__in=recipe_ids).update(
+                    search_vector=recipe_search_vector()
+                )
+            transaction.on_commit(bump_recipes_version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, рецептов: '
+            f'{len(recipe_ids)}, время: {time.monotonic() - started:.2f} с'
+        ))
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+
+    def save_image(self):
+        if default_storage.exists(IMAGE_NAME):
+            return
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 400), (230, 180, 120)).save(buffer, 'JPEG')
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count):
+        password = make_password(DATASET_PASSWORD)
+        self.bulk_create(User, [
+            User(
+                username=f'{DATASET_USERNAME_PREFIX}{number}',
+                email=f'{DATASET_USERNAME_PREFIX}{number}@example.com',
+                first_name=f'Имя{number}',
+                last_name=f'Фамилия{number}',
+                password=password,
+            )
+            for number in range(count)
+        ])
+        return list(User.objects.filter(
+            username__startswith=DATASET_USERNAME_PREFIX
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_recipes(self, users, count, ingredients_count):
+        """Создаёт рецепты и возвращает их id по авторам."""
+        ingredients = list(
+            Ingredient.objects.order_by('pk').values_list('pk', 'name')
+        )
+        tags = list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+        plans = []
+        for number in range(count):
+            chosen = self.random.sample(
+                ingredients, min(ingredients_count, len(ingredients))
+            )
+            title = ', '.join(name for _, name in chosen[:2])
+            plans.append((
+                Recipe(
+                    author_id=self.random.choice(users),
+                    name=(
+                        f'{self.random.choice(DISHES)} №{number}: {title}'
+                    )[:MAX_FIELD_LENGTH],
+                    text=' '.join(
+                        f'Добавьте {name}.' for _, name in chosen
+                    ),
+                    cooking_time=self.random.randint(5, 180),
+                    image=IMAGE_NAME,
+                ),
+                [pk for pk, _ in chosen],
+                self.random.sample(tags, self.random.randint(1, len(tags))),
+            ))
+        self.bulk_create(Recipe, [recipe for recipe, _, _ in plans])
+        ids = Recipe.objects.filter(
+            author_id__in=users
+        ).order_by('pk').values_list('pk', 'author_id')
+        recipes = {}
+        links = []
+        tag_links = []
+        for (recipe_id, author_id), (_, chosen, chosen_tags) in zip(
+            ids, plans
+        ):
+            recipes.setdefault(author_id, []).append(recipe_id)
+            links.extend(
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for ingredient_id in chosen
+            )
+            tag_links.extend(
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for tag_id in chosen_tags
+            )
+        self.bulk_create(RecipeIngredient, links)
+        self.bulk_create(Recipe.tags.through, tag_links)
+        return recipes
+
+    def create_relations(self, model, users, recipe_ids, count):
+        count = min(count, len(recipe_ids))
+        self.bulk_create(model, [
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in users
+            for recipe_id in self.random.sample(recipe_ids, count)
+        ])
+
+    def create_subscriptions(self, users, recipes, count):
+        subscriptions = []
+        entries = []
+        for user_id in users:
+            authors = self.random.sample(
+                users, min(count + 1, len(users))
+            )
+            for author_id in [
+                author for author in authors if author != user_id
+            ][:count]:
+                subscriptions.append(
+                    Subscribe(user_id=user_id, author_id=author_id)
+                )
+                entries.extend(
+                    FeedEntry(
+                        user_id=user_id,
+                        recipe_id=recipe_id,
+                        author_id=author_id,
+                    )
+                    for recipe_id in recipes.get(author_id, ())
+                )
+        self.bulk_create(Subscribe, subscriptions)
+        self.bulk_create(FeedEntry, entries)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import render_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Построить уменьшенные копии фото рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для уже обработанных рецептов',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        processed = 0
+        for recipe_id, name in recipes.values_list('id', 'image').iterator():
+            try:
+                variants = render_variants(name)
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(
+                    f'Ошибка при обработке фото "{name}": {e}'
+                ))
+                continue
+            Recipe.objects.filter(pk=recipe_id, image=name).update(
+                image_variants=variants
+            )
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано фото: {processed}'
+        ))
@@ -1,37 +1,76 @@
-import json
+import time
+from pathlib import Path
+
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.constants import BULK_BATCH_SIZE
+from recipes.bulk import bulk_insert, iter_csv_rows, iter_json_array
+from recipes.catalog import bump_catalog_version
 from recipes.models import Ingredient
 
+FIELDS = ('name', 'measurement_unit')
+
 
 class Command(BaseCommand):
     help = 'Загрузить данные об ингредиентах в базу данных'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=Path(settings.BASE_DIR) / 'data' / 'ingredients.json',
+            help='Путь к файлу .json или .csv',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            help='Формат файла; по умолчанию — по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BULK_BATCH_SIZE,
+            help='Число строк в одной вставке',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить файл без записи в базу',
+        )
+
+    def read_rows(self, file, file_format):
+        if file_format == 'csv':
+            yield from iter_csv_rows(file, FIELDS)
+            return
+        for item in iter_json_array(file):
+            yield {field: item[field] for field in FIELDS}
+
     def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError('Поддерживаются только файлы .json и .csv')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше 0')
+        started = time.monotonic()
         try:
-            file_path = 'data/ingredients.json'
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                successfully_loaded = set()
-                for item in data:
-                    try:
-                        ingredient, created = Ingredient.objects.get_or_create(
-                            **item)
-                        if created:
-                            successfully_loaded.add((item['name'],
-                                                     item['measurement_unit']))
-                            self.stdout.write(self.style.SUCCESS(
-                                f'Ингредиенты "{ingredient}" '
-                                f'успешно добавлены'))
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(
-                            f'Ошибка при импорте ингредиента:'
-                            f' {e}"{ingredient}"'))
-            duplicates = [item for item in data if (item['name'],
-                                                    item['measurement_unit'])
-                          not in successfully_loaded]
-            if duplicates:
-                self.stdout.write(self.style.WARNING(
-                    f'Следующие ингредиенты не были '
-                    f'загружены из-за дубликатов: {duplicates}'))
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                inserted, skipped = bulk_insert(
+                    Ingredient,
+                    self.read_rows(file, file_format),
+                    FIELDS,
+                    options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
         except FileNotFoundError:
             raise CommandError('Файл с данными не найден')
+        except (KeyError, ValueError) as e:
+            raise CommandError(f'Ошибка в файле с данными: {e}')
+        if not options['dry_run'] and inserted:
+            bump_catalog_version()
+        prefix = 'Проверка без записи. ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Добавлено: {inserted}, пропущено: {skipped}, '
+            f'время: {time.monotonic() - started:.2f} с'
+        ))
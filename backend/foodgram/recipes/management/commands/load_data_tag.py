@@ -1,22 +1,38 @@
+import time
+
 from django.core.management import BaseCommand
+
+from foodgram.constants import BULK_BATCH_SIZE
+from recipes.bulk import bulk_insert
+from recipes.catalog import bump_catalog_version
 from recipes.models import Tag
 
 
 class Command(BaseCommand):
     help = 'Загрузить данные о тегах в базу данных'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Проверить данные без записи в базу',
+        )
+
     def handle(self, *args, **options):
         data = [
             {'name': 'Завтрак', 'color': '#2dbd4f', 'slug': 'breakfast'},
             {'name': 'Обед', 'color': '#2d8fbd', 'slug': 'dinner'},
             {'name': 'Ужин', 'color': '#cf88db', 'slug': 'supper'},
         ]
-        for item in data:
-            tag, created = Tag.objects.get_or_create(**item)
-            if created:
-                self.stdout.write(self.style.SUCCESS(
-                    f'Тег "{tag}" успешно создан'
-                ))
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'Тег "{tag}" уже существует'))
+        started = time.monotonic()
+        inserted, skipped = bulk_insert(
+            Tag, data, ('slug',), BULK_BATCH_SIZE,
+            dry_run=options['dry_run'],
+        )
+        if not options['dry_run'] and inserted:
+            bump_catalog_version()
+        prefix = 'Проверка без записи. ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Добавлено тегов: {inserted}, пропущено: '
+            f'{skipped}, время: {time.monotonic() - started:.2f} с'
+        ))
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount_counters
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать счётчики избранного, корзин, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recount_counters(Recipe, Favorite, ShoppingCart, User, Subscribe)
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
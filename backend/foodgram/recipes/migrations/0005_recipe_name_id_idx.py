@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['name', 'id'], name='recipe_name_id_idx'),
+        ),
+    ]
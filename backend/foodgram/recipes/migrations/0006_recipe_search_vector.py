@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:11
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_vector_idx ON recipes_recipe '
+        'USING gin (search_vector)'
+    )
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(
+        search_vector=SearchVector('name', weight='A', config='russian')
+        + SearchVector('text', weight='B', config='russian')
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
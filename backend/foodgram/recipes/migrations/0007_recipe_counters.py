@@ -0,0 +1,61 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User = apps.get_model('users', 'User')
+    Recipe.objects.update(
+        favorites_count=count_of(
+            apps.get_model('recipes', 'Favorite'), 'recipe'
+        ),
+        carts_count=count_of(
+            apps.get_model('recipes', 'ShoppingCart'), 'recipe'
+        ),
+    )
+    User.objects.update(
+        recipes_count=count_of(Recipe, 'author'),
+        subscribers_count=count_of(
+            apps.get_model('users', 'Subscribe'), 'author'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_vector'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', 'id'], name='recipe_popular_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FEED_BACKFILL_LIMIT = 100
+
+
+def fill_feed(apps, schema_editor):
+    Subscribe = apps.get_model('users', 'Subscribe')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    for user_id, author_id in Subscribe.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        recipe_ids = Recipe.objects.filter(
+            author_id=author_id
+        ).order_by('-id').values_list('id', flat=True)[:FEED_BACKFILL_LIMIT]
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                          author_id=author_id)
+                for recipe_id in recipe_ids
+            ],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_recipe_counters'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='feed_entry_unique'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
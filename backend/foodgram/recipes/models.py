@@ -1,15 +1,31 @@
 import uuid
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import (SearchQuery,
+                                            SearchRank,
+                                            SearchVector,
+                                            SearchVectorField)
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import connections, models
+from django.db.models import (BooleanField,
+                              Case,
+                              Exists,
+                              F,
+                              FloatField,
+                              Func,
+                              OuterRef,
+                              Q,
+                              UniqueConstraint,
+                              Value,
+                              When)
 
 from foodgram.constants import (MIN_VALUE,
                                 MAX_FIELD_LENGTH,
                                 MAX_COLOR_LENGTH,
                                 message,
-                                LENGTH)
+                                LENGTH,
+                                SEARCH_CONFIG)
+from users.models import Subscribe
 
 User = get_user_model()
 
@@ -62,6 +78,100 @@ class Tag(models.Model):
         return self.name
 
 
+class Casefold(Func):
+    """
+    Строка без учёта регистра. LOWER в SQLite меняет регистр только
+    у латиницы, поэтому там вызывается str.casefold, которую
+    register_casefold добавляет при подключении к базе.
+    """
+    function = 'LOWER'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function='casefold', **extra_context
+        )
+
+
+def casefold(value):
+    return None if value is None else value.casefold()
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Запросы к рецептам с признаками текущего пользователя."""
+
+    def with_user_flags(self, user):
+        """
+        Вычисляет is_favorited, is_in_shopping_cart и author_is_subscribed
+        в SQL, чтобы сериализатор не обращался к базе для каждого рецепта.
+        """
+        if user is None or not user.is_authenticated:
+            false = Value(False, output_field=BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false,
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            author_is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author')
+            )),
+        )
+
+    def with_related(self):
+        """Подгружает автора, теги и ингредиенты рецептов."""
+        return self.select_related('author').prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            models.Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('id'),
+            ),
+        )
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию и описанию с сортировкой по
+        релевантности. На PostgreSQL использует поле search_vector с
+        GIN-индексом, на других базах — поиск по подстроке без учёта
+        регистра.
+        """
+        if connections[self.db].vendor == 'postgresql':
+            search_query = SearchQuery(query, config=SEARCH_CONFIG)
+            queryset = self.filter(search_vector=search_query).annotate(
+                search_rank=SearchRank(F('search_vector'), search_query)
+            )
+        else:
+            query = casefold(query)
+            queryset = self.alias(
+                search_name=Casefold('name'),
+                search_text=Casefold('text'),
+            ).filter(
+                Q(search_name__contains=query) | Q(search_text__contains=query)
+            ).annotate(
+                search_rank=Case(
+                    When(search_name__contains=query, then=Value(1.0)),
+                    default=Value(0.5),
+                    output_field=FloatField(),
+                )
+            )
+        return queryset.order_by('-search_rank', 'name', 'id')
+
+
+def recipe_search_vector():
+    """Выражение для заполнения Recipe.search_vector."""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
 class Recipe(models.Model):
     """Модель рецептов"""
     author = models.ForeignKey(
@@ -79,6 +189,12 @@ class Recipe(models.Model):
         'Фото',
         upload_to='recipes/images/'
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Введите описание рецепта',
@@ -99,10 +215,35 @@ class Recipe(models.Model):
         verbose_name='Тег',
     )
 
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False,
+    )
+    carts_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['name', 'id'], name='recipe_name_id_idx'),
+            models.Index(
+                fields=['-favorites_count', 'id'],
+                name='recipe_popular_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -227,3 +368,38 @@ class RecipeTag(models.Model):
                 name='recipe_tag_unique'
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='feed_entry_unique'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.recipe_id}'
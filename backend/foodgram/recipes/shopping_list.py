@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.db.models import Sum
+
+from foodgram.constants import SHOPPING_LIST_CACHE_TIMEOUT
+from recipes.catalog import bump_version, get_catalog_version, get_version
+from recipes.models import RecipeIngredient, ShoppingCart
+
+SHOPPING_LIST_VERSION_KEY = 'shopping-list-version:{}'
+SHOPPING_LIST_KEY = 'shopping-list:{}:{}:{}'
+
+
+def get_shopping_list(user):
+    """
+    Строки списка покупок (название, единица измерения, количество).
+
+    Без кэша строки читаются курсором на стороне сервера и по мере чтения
+    отдаются вызывающему; полный список кэшируется до следующего
+    изменения корзины пользователя, состава рецептов в ней или
+    справочника ингредиентов.
+    """
+    key = SHOPPING_LIST_KEY.format(
+        user.id,
+        get_version(SHOPPING_LIST_VERSION_KEY.format(user.id)),
+        get_catalog_version(),
+    )
+    rows = cache.get(key)
+    if rows is not None:
+        yield from rows
+        return
+    rows = []
+    ingredients = RecipeIngredient.objects.filter(
+        recipe__shopping_carts__user=user
+    ).values_list(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('ingredient__name', 'ingredient__measurement_unit')
+    for row in ingredients.iterator():
+        rows.append(row)
+        yield row
+    cache.set(key, rows, SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def invalidate_shopping_lists(*user_ids):
+    for user_id in user_ids:
+        bump_version(SHOPPING_LIST_VERSION_KEY.format(user_id))
+
+
+def invalidate_recipe_shopping_lists(recipe):
+    """Сбрасывает списки покупок всех, у кого рецепт в корзине."""
+    invalidate_shopping_lists(*ShoppingCart.objects.filter(
+        recipe=recipe
+    ).values_list('user_id', flat=True))
@@ -0,0 +1,208 @@
+from django.db import connections, transaction
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipes import background
+from recipes.catalog import bump_catalog_version, bump_recipes_version
+from recipes.counters import (change_counter,
+                              clear_deletions,
+                              finish_deletion,
+                              is_deleting,
+                              remember_references,
+                              start_deletion,
+                              update_counter)
+from recipes.feed import backfill_feed, fan_out_recipe, remove_from_feed
+from recipes.models import (Favorite,
+                            Ingredient,
+                            Recipe,
+                            RecipeIngredient,
+                            ShoppingCart,
+                            Tag,
+                            casefold,
+                            recipe_search_vector)
+from recipes.shopping_list import (invalidate_recipe_shopping_lists,
+                                   invalidate_shopping_lists)
+from users.models import Subscribe, User
+
+# Поля автора, которые попадают в представление рецепта.
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def catalog_changed(**kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_changed(sender, instance, using, **kwargs):
+    # Ингредиенты удаляемого рецепта: версию сменит сам рецепт.
+    if sender is RecipeIngredient and is_deleting(
+        Recipe, instance.recipe_id, using
+    ):
+        return
+    transaction.on_commit(bump_recipes_version)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(instance, update_fields=None, **kwargs):
+    """Запоминает поля автора из представления рецепта до сохранения."""
+    instance._author_fields = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(AUTHOR_FIELDS)
+    ):
+        return
+    instance._author_fields = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def author_changed(instance, **kwargs):
+    """
+    Сбрасывает кэш рецептов, только если автор рецептов изменил поля,
+    которые есть в ответе: регистрации, смены пароля и входы его не
+    трогают. Удаление автора удаляет и рецепты, что сбросит кэш.
+    """
+    old = getattr(instance, '_author_fields', None)
+    if old is None or old == tuple(
+        getattr(instance, field) for field in AUTHOR_FIELDS
+    ):
+        return
+    if Recipe.objects.filter(author=instance).exists():
+        transaction.on_commit(bump_recipes_version)
+
+
+@receiver(pre_delete, sender=Recipe)
+@receiver(pre_delete, sender=User)
+def deletion_started(instance, **kwargs):
+    """
+    Каскадное удаление рецепта или пользователя не обновляет счётчики
+    по строке: счётчики самого удаляемого объекта не нужны, а
+    счётчики рецептов, которые пользователь добавил в избранное и
+    корзину, уменьшаются здесь одним UPDATE на связь.
+    """
+    start_deletion(instance)
+    if isinstance(instance, User):
+        change_counter(
+            Recipe.objects.filter(favorites__user=instance),
+            'favorites_count',
+            -1
+        )
+        change_counter(
+            Recipe.objects.filter(shopping_carts__user=instance),
+            'carts_count',
+            -1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def deletion_finished(instance, **kwargs):
+    finish_deletion(instance)
+
+
+request_finished.connect(clear_deletions)
+
+
+@receiver(pre_save, sender=Favorite)
+@receiver(pre_save, sender=ShoppingCart)
+def remember_recipe(instance, **kwargs):
+    remember_references(instance, 'recipe_id')
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(instance, using, **kwargs):
+    if is_deleting(User, instance.user_id, using):
+        return
+    if not is_deleting(Recipe, instance.recipe_id, using):
+        update_counter(
+            Recipe, 'carts_count', instance, 'recipe_id', **kwargs
+        )
+    transaction.on_commit(
+        lambda: invalidate_shopping_lists(instance.user_id)
+    )
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(instance, using, **kwargs):
+    """Состав рецепта изменён поштучно, например в админке."""
+    if not is_deleting(Recipe, instance.recipe_id, using):
+        transaction.on_commit(
+            lambda: invalidate_recipe_shopping_lists(instance.recipe_id)
+        )
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorite_changed(instance, using, **kwargs):
+    if is_deleting(User, instance.user_id, using) or is_deleting(
+        Recipe, instance.recipe_id, using
+    ):
+        return
+    update_counter(
+        Recipe, 'favorites_count', instance, 'recipe_id', **kwargs
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(instance, using, **kwargs):
+    if connections[using].vendor == 'postgresql':
+        Recipe.objects.using(using).filter(pk=instance.pk).update(
+            search_vector=recipe_search_vector()
+        )
+
+
+@receiver(connection_created)
+def register_casefold(connection, **kwargs):
+    """Добавляет в SQLite функцию casefold для поиска рецептов."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'casefold', 1, casefold, deterministic=True
+        )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_author(instance, **kwargs):
+    remember_references(instance, 'author_id')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_counted(instance, using, **kwargs):
+    if not is_deleting(User, instance.author_id, using):
+        update_counter(User, 'recipes_count', instance, 'author_id', **kwargs)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_fan_out(instance, created, **kwargs):
+    if created and instance.author_id:
+        transaction.on_commit(lambda: background.submit(
+            fan_out_recipe, instance.pk, instance.author_id
+        ))
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_backfill(instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: background.submit(
+            backfill_feed, instance.user_id, instance.author_id
+        ))
+
+
+@receiver(post_delete, sender=Subscribe)
+def unsubscribe_cleanup(instance, using, **kwargs):
+    # При удалении пользователя записи ленты удалит каскад.
+    if is_deleting(User, instance.user_id, using) or is_deleting(
+        User, instance.author_id, using
+    ):
+        return
+    remove_from_feed(instance.user_id, instance.author_id)
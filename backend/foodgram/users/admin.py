@@ -14,7 +14,7 @@ class UserAdmin(BaseUserAdmin):
     """Поиск по полям"""
     search_fields = ('email', 'username',)
     """ Автоматически добавит фильтр этого поля на стороне администратора"""
-    list_filter = ('email', 'username',)
+    list_filter = ('is_active', 'is_staff', 'is_superuser',)
     list_display_links = ('username',)
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
@@ -37,8 +37,10 @@ class UserAdmin(BaseUserAdmin):
 class SubscribeAdmin(admin.ModelAdmin):
     """Подписки"""
     list_display = ('id', 'user', 'author')
-    search_fields = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    show_full_result_count = False
     empty_value_display = 'Не задано'
 
 
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписчиков'),
+        ),
+    ]
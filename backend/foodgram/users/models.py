@@ -33,6 +33,16 @@ class User(AbstractUser):
                                   )
     last_name = models.CharField(verbose_name='Фамилия',
                                  max_length=MAX_NAME_LENGTH)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Число рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('username',)
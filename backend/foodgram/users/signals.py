@@ -0,0 +1,37 @@
+from django.db.models.signals import (post_delete,
+                                      post_save,
+                                      pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipes.counters import (change_counter,
+                              is_deleting,
+                              remember_references,
+                              update_counter)
+from users.models import Subscribe, User
+
+
+@receiver(pre_save, sender=Subscribe)
+def remember_author(instance, **kwargs):
+    remember_references(instance, 'author_id')
+
+
+@receiver((post_save, post_delete), sender=Subscribe)
+def subscribe_changed(instance, using, **kwargs):
+    if is_deleting(User, instance.user_id, using) or is_deleting(
+        User, instance.author_id, using
+    ):
+        return
+    update_counter(
+        User, 'subscribers_count', instance, 'author_id', **kwargs
+    )
+
+
+@receiver(pre_delete, sender=User)
+def subscriber_deleted(instance, **kwargs):
+    """Уменьшает счётчики авторов удаляемого подписчика одним UPDATE."""
+    change_counter(
+        User.objects.filter(subscribing__user=instance),
+        'subscribers_count',
+        -1
+    )